@@ -0,0 +1,329 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # redis is only needed for the shared backend
+    redis = None
+
+
+class CacheBackend:
+    """
+    Minimal async key/value interface shared by all cache backends.
+
+    Values must be JSON serializable so that every backend stores exactly
+    the same data and workers can share entries through disk or Redis.
+    """
+
+    def __init__(self, namespace: str, default_ttl: float | None = None):
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str):
+        raise NotImplementedError
+
+    async def set(self, key: str, value, ttl: float | None = None):
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+    async def add(self, key: str, value, ttl: float | None = None) -> bool:
+        """Atomically stores `value` only if `key` is absent; returns True when stored."""
+        raise NotImplementedError
+
+    async def delete_if(self, key: str, value) -> bool:
+        """Atomically deletes `key` only if it still holds `value`; returns True when deleted."""
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """
+    In-process LRU cache with TTL and size based eviction.
+
+    Also serves as the local stand-in for the shared backends in tests and
+    single-worker development setups.
+    """
+
+    def __init__(self, namespace: str, default_ttl: float | None = None,
+                 max_entries: int = 256, max_bytes: int = 256 * 1024 * 1024):
+        super().__init__(namespace, default_ttl)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[float | None, int, str]] = OrderedDict()
+        self._size = 0
+
+    async def get(self, key: str):
+        key = self._key(key)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _, payload = entry
+        if expires_at is not None and expires_at <= time.time():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return json.loads(payload)
+
+    async def set(self, key: str, value, ttl: float | None = None):
+        key = self._key(key)
+        ttl = ttl if ttl is not None else self.default_ttl
+        payload = json.dumps(value)
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+
+        self._remove(key)
+        self._entries[key] = (time.time() + ttl if ttl else None, size, payload)
+        self._size += size
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    async def delete(self, key: str):
+        self._remove(self._key(key))
+
+    async def add(self, key: str, value, ttl: float | None = None) -> bool:
+        # get and set never yield to the event loop, so this is atomic per process
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete_if(self, key: str, value) -> bool:
+        if await self.get(key) != value:
+            return False
+        await self.delete(key)
+        return True
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+
+class DiskCache(CacheBackend):
+    """
+    On-disk cache shared by all workers on the same host.
+
+    Each entry is one JSON file written atomically; the least recently
+    written files are evicted once the directory grows past `max_bytes`.
+    """
+
+    def __init__(self, namespace: str, directory: str, default_ttl: float | None = None,
+                 max_bytes: int = 1024 * 1024 * 1024):
+        super().__init__(namespace, default_ttl)
+        self.directory = os.path.join(directory, namespace)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(self._key(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    async def get(self, key: str):
+        return await asyncio.to_thread(self._get, self._path(key))
+
+    async def set(self, key: str, value, ttl: float | None = None):
+        ttl = ttl if ttl is not None else self.default_ttl
+        entry = {"expires_at": time.time() + ttl if ttl else None, "value": value}
+        await asyncio.to_thread(self._set, self._path(key), json.dumps(entry))
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._remove, self._path(key))
+
+    async def add(self, key: str, value, ttl: float | None = None) -> bool:
+        ttl = ttl if ttl is not None else self.default_ttl
+        entry = {"expires_at": time.time() + ttl if ttl else None, "value": value}
+        return await asyncio.to_thread(self._add, self._path(key), json.dumps(entry))
+
+    async def delete_if(self, key: str, value) -> bool:
+        return await asyncio.to_thread(self._delete_if, self._path(key), value)
+
+    def _delete_if(self, path: str, value) -> bool:
+        # Renaming takes the entry away atomically, so no other process can replace it while it is checked
+        taken = f"{path}.{os.getpid()}.{threading.get_ident()}.taken"
+        try:
+            os.rename(path, taken)
+        except FileNotFoundError:
+            return False
+        if self._get(taken) == value:
+            self._remove(taken)
+            return True
+        try:
+            # Put it back unless a new entry was created meanwhile; link never overwrites
+            os.link(taken, path)
+        except (FileExistsError, FileNotFoundError):
+            # FileNotFoundError: the entry had expired and is already gone
+            pass
+        self._remove(taken)
+        return False
+
+    def _add(self, path: str, payload: str) -> bool:
+        # Drops the entry first if it has expired
+        if self._get(path) is not None:
+            return False
+        try:
+            # O_EXCL makes creation atomic across processes
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(payload)
+        return True
+
+    def _get(self, path: str):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if entry["expires_at"] is not None and entry["expires_at"] <= time.time():
+            self._remove(path)
+            return None
+        return entry["value"]
+
+    def _set(self, path: str, payload: str):
+        with tempfile.NamedTemporaryFile("w", dir=self.directory, delete=False, suffix=".tmp", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(f.name, path)
+        self._evict()
+
+    def _evict(self):
+        files = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(files):
+            self._remove(path)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# Compare-and-delete in one round trip; Redis runs scripts atomically
+DELETE_IF_EQUAL_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class RedisCache(CacheBackend):
+    """
+    Redis backed cache shared across workers and hosts.
+
+    Size based eviction is left to the server's `maxmemory-policy`.
+    """
+
+    def __init__(self, namespace: str, url: str, default_ttl: float | None = None):
+        super().__init__(namespace, default_ttl)
+        if redis is None:
+            raise ImportError("The redis package is required for the redis cache backend.")
+        self.client = redis.from_url(url)
+
+    async def get(self, key: str):
+        payload = await self.client.get(self._key(key))
+        return json.loads(payload) if payload is not None else None
+
+    async def set(self, key: str, value, ttl: float | None = None):
+        ttl = ttl if ttl is not None else self.default_ttl
+        await self.client.set(self._key(key), json.dumps(value), ex=int(ttl) if ttl else None)
+
+    async def delete(self, key: str):
+        await self.client.delete(self._key(key))
+
+    async def add(self, key: str, value, ttl: float | None = None) -> bool:
+        ttl = ttl if ttl is not None else self.default_ttl
+        stored = await self.client.set(self._key(key), json.dumps(value), ex=int(ttl) if ttl else None, nx=True)
+        return bool(stored)
+
+    async def delete_if(self, key: str, value) -> bool:
+        deleted = await self.client.eval(DELETE_IF_EQUAL_SCRIPT, 1, self._key(key), json.dumps(value))
+        return bool(deleted)
+
+
+class BlockingCache:
+    """
+    Synchronous facade over a CacheBackend for code running in worker threads.
+
+    Operations run on one private event loop thread shared by all facades,
+    so backends holding loop-bound connections (Redis) keep working no
+    matter which thread calls them.
+    """
+    _loop = None
+    _loop_lock = threading.Lock()
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+
+    @classmethod
+    def _event_loop(cls):
+        with cls._loop_lock:
+            if cls._loop is None:
+                cls._loop = asyncio.new_event_loop()
+                threading.Thread(target=cls._loop.run_forever, name="blocking-cache", daemon=True).start()
+            return cls._loop
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._event_loop()).result()
+
+    def get(self, key: str):
+        return self._run(self.backend.get(key))
+
+    def set(self, key: str, value, ttl: float | None = None):
+        self._run(self.backend.set(key, value, ttl))
+
+    def delete(self, key: str):
+        self._run(self.backend.delete(key))
+
+
+def create_cache(namespace: str, default_ttl: float | None = None, max_bytes: int | None = None,
+                 shared: bool = False) -> CacheBackend:
+    """
+    Builds the cache backend selected by the CACHE_BACKEND environment variable.
+
+    Args:
+        namespace (str): Prefix that keeps entries of different caches apart
+        default_ttl (float | None): Expiry in seconds applied when `set` gets no ttl
+        max_bytes (int | None): Size bound for the memory and disk backends
+        shared (bool): Whether every worker must see the same entries; such
+            caches use "disk" where "memory" is configured
+
+    Returns:
+        CacheBackend: "memory" (default), "disk" (CACHE_DIR) or "redis" (REDIS_URL)
+    """
+    backend = os.getenv("CACHE_BACKEND", "memory")
+    if shared and backend == "memory":
+        # Per-process entries would be invisible to the other uvicorn workers
+        backend = "disk"
+    if backend == "redis":
+        return RedisCache(namespace, os.getenv("REDIS_URL", "redis://localhost:6379/0"), default_ttl)
+
+    size_kwargs = {"max_bytes": max_bytes} if max_bytes else {}
+    if backend == "disk":
+        directory = os.getenv("CACHE_DIR", os.path.join(tempfile.gettempdir(), "gittopod-cache"))
+        return DiskCache(namespace, directory, default_ttl, **size_kwargs)
+    return MemoryCache(namespace, default_ttl, **size_kwargs)
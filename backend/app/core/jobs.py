@@ -0,0 +1,109 @@
+import asyncio
+import time
+import uuid
+from app.core.cache import CacheBackend
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+TERMINAL_STATUSES = (SUCCEEDED, FAILED)
+
+
+class JobManager:
+    """
+    Runs long pipelines in the background and records their progress.
+
+    Job records live in a cache backend, so with the disk or Redis backend
+    any worker can answer status polls for a job started on another one.
+    At most `max_workers` jobs run at once per process; the rest wait queued.
+
+    Jobs run inside the process that accepted them. While it is alive it
+    renews a lease on the record every few seconds; a job whose lease ran
+    out belonged to a worker that died or restarted and is reported failed.
+    A job running longer than `max_runtime` seconds is cancelled and failed.
+    """
+
+    def __init__(self, store: CacheBackend, max_workers: int = 4, lease: float = 60,
+                 max_runtime: float = 1800):
+        self.store = store
+        self.max_workers = max_workers
+        self.lease = lease
+        self.max_runtime = max_runtime
+        self._semaphore: asyncio.Semaphore | None = None
+        # Keep references so running tasks are not garbage collected
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, pipeline) -> str:
+        """
+        Queues `pipeline` and returns the new job id immediately.
+
+        Args:
+            pipeline (callable): Coroutine function taking a `report_stage(stage)`
+                coroutine and returning a JSON serializable result
+
+        Returns:
+            str: The job id
+        """
+        job_id = uuid.uuid4().hex
+        await self._save(job_id, {"status": QUEUED, "stage": None, "result": None, "error": None,
+                                  "created_at": time.time(), "lease_expires_at": time.time() + self.lease})
+        task = asyncio.create_task(self._run(job_id, pipeline))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job_id
+
+    async def get(self, job_id: str) -> dict | None:
+        job = await self.store.get(job_id)
+        if job is not None and job["status"] not in TERMINAL_STATUSES \
+                and job.get("lease_expires_at", float("inf")) < time.time():
+            job.update(status=FAILED, error="Job was interrupted by a server restart")
+            await self._save(job_id, job)
+        return job
+
+    async def _run(self, job_id: str, pipeline):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        # Serializes the read-modify-write updates of the heartbeat and the pipeline
+        lock = asyncio.Lock()
+
+        async def update(**fields):
+            async with lock:
+                await self._update(job_id, lease_expires_at=time.time() + self.lease, **fields)
+
+        async def heartbeat():
+            while True:
+                await asyncio.sleep(self.lease / 3)
+                await update()
+
+        async def report_stage(stage: str):
+            await update(status=RUNNING, stage=stage)
+
+        heartbeat_task = asyncio.create_task(heartbeat())
+        try:
+            async with self._semaphore:
+                await update(status=RUNNING)
+                try:
+                    result = await asyncio.wait_for(pipeline(report_stage), self.max_runtime)
+                except asyncio.TimeoutError:
+                    print(f"Job {job_id} exceeded {self.max_runtime}s")
+                    fields = {"status": FAILED, "error": "Job took too long"}
+                except Exception as e:
+                    print(f"Job {job_id} failed: {e}")
+                    fields = {"status": FAILED, "error": str(e)}
+                else:
+                    fields = {"status": SUCCEEDED, "stage": "done", "result": result}
+        finally:
+            heartbeat_task.cancel()
+        await update(**fields)
+
+    async def _update(self, job_id: str, **fields):
+        job = await self.store.get(job_id) or {}
+        job.update(fields)
+        await self._save(job_id, job)
+
+    async def _save(self, job_id: str, job: dict):
+        job["job_id"] = job_id
+        job["updated_at"] = time.time()
+        await self.store.set(job_id, job)
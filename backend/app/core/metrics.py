@@ -0,0 +1,56 @@
+import threading
+from collections import defaultdict, deque
+
+
+class Metrics:
+    """
+    In-process counters and sample windows, reported per worker by GET /metrics.
+
+    Observations keep the last `window` samples so percentiles follow
+    recent behaviour rather than the whole lifetime of the worker.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = defaultdict(float)
+        self._samples: dict[str, deque] = defaultdict(lambda: deque(maxlen=self.window))
+        self._totals: dict[str, list[float]] = defaultdict(lambda: [0, 0.0])
+
+    def increment(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            self._samples[name].append(value)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += value
+
+    def percentile(self, name: str, percent: float) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples.get(name, ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(percent / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            names = list(self._samples)
+            totals = {name: tuple(self._totals[name]) for name in names}
+        observations = {}
+        for name in names:
+            count, total = totals[name]
+            observations[name] = {
+                "count": count,
+                "mean": total / count if count else None,
+                "p50": self.percentile(name, 50),
+                "p95": self.percentile(name, 95),
+            }
+        return {"counters": counters, "observations": observations}
+
+
+metrics = Metrics()
@@ -0,0 +1,66 @@
+import asyncio
+import uuid
+from app.core.cache import CacheBackend
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key so the work runs only once.
+
+    Within a process, later callers await the task started by the first one.
+    Across workers, a lock in the shared cache backend elects one runner and
+    the others poll for the result it publishes. If the runner fails, the
+    lock is released without a result and a waiting worker takes over.
+
+    Args:
+        store (CacheBackend): Shared backend holding locks and published results
+        lock_ttl (float): Upper bound on how long one run may hold the lock
+        result_ttl (float): How long a finished result stays available to waiters
+        poll_interval (float): Seconds between result checks while another worker runs
+    """
+
+    def __init__(self, store: CacheBackend, lock_ttl: float = 900, result_ttl: float = 300,
+                 poll_interval: float = 1.0):
+        self.store = store
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self._in_flight: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn):
+        """
+        Returns the result of `fn()`, sharing it with every concurrent caller using `key`.
+
+        Args:
+            key (str): Identifies equivalent work
+            fn (callable): Coroutine function producing a JSON serializable result
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run_once(key, fn))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shield so a disconnecting caller does not cancel the work for everyone else
+        return await asyncio.shield(task)
+
+    async def _run_once(self, key: str, fn):
+        owner = uuid.uuid4().hex
+        waited = 0.0
+        while True:
+            result = await self.store.get(f"result:{key}")
+            if result is not None:
+                return result["value"]
+
+            if await self.store.add(f"lock:{key}", owner, ttl=self.lock_ttl):
+                try:
+                    value = await fn()
+                    await self.store.set(f"result:{key}", {"value": value}, ttl=self.result_ttl)
+                    return value
+                finally:
+                    # A run that outlived lock_ttl must not release the lock another worker took over
+                    await self.store.delete_if(f"lock:{key}", owner)
+
+            if waited >= self.lock_ttl:
+                raise TimeoutError("Timed out waiting for an identical request to finish.")
+            await asyncio.sleep(self.poll_interval)
+            waited += self.poll_interval
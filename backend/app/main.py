@@ -2,15 +2,25 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
-from app.routers import generate, modify
+from app.routers import generate, modify, artifacts
 from app.core.limiter import limiter
+from app.core.metrics import metrics
 from typing import cast
 from starlette.exceptions import ExceptionMiddleware
 from api_analytics.fastapi import Analytics
+from app.services.github_service import AsyncGitHubService
+from contextlib import asynccontextmanager
 import os
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Release the pooled GitHub connections on shutdown
+    await AsyncGitHubService.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 origins = [
@@ -37,9 +47,16 @@ app.add_exception_handler(RateLimitExceeded, cast(
 
 app.include_router(generate.router)
 app.include_router(modify.router)
+app.include_router(artifacts.router)
 
 
 @app.get("/")
 @limiter.limit("100/day")
 async def root(request: Request):
     return {"message": "Hello from GitToPod API!"}
+
+
+@app.get("/metrics")
+async def get_metrics():
+    # Per-worker numbers; nginx does not expose this path publicly
+    return metrics.snapshot()
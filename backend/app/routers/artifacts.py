@@ -0,0 +1,91 @@
+from fastapi import APIRouter, Request, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from app.services.artifact_store import ArtifactStore, media_type_for, digest_of
+import asyncio
+import os
+import re
+
+router = APIRouter(prefix="/artifacts", tags=["Artifacts"])
+
+artifact_store = ArtifactStore()
+
+CHUNK_SIZE = 64 * 1024
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(range_header: str, file_size: int) -> tuple[int, int] | None:
+    """
+    Parses a single-range `Range` header into inclusive (start, end) offsets.
+
+    Returns None when the header should be ignored (malformed or multi-range),
+    raises HTTPException 416 when the range cannot be satisfied.
+    """
+    match = RANGE_PATTERN.match(range_header.strip())
+    if not match:
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0 or file_size == 0:
+            raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{file_size}"})
+        return max(file_size - length, 0), file_size - 1
+
+    start = int(start)
+    end = min(int(end), file_size - 1) if end else file_size - 1
+    if start >= file_size or start > end:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{file_size}"})
+    return start, end
+
+
+def iter_file(path: str, start: int, length: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@router.get("/{artifact_id}")
+async def get_artifact(request: Request, artifact_id: str):
+    path = artifact_store.path(artifact_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    # Downloads keep an artifact from being swept as unused
+    await asyncio.to_thread(artifact_store.touch, artifact_id)
+
+    etag = f'"{digest_of(artifact_id)}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        # Artifacts are content addressed and never change
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Expose-Headers": "Content-Range, Content-Length, ETag",
+    }
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    file_size = os.path.getsize(path)
+    byte_range = None
+    range_header = request.headers.get("range")
+    # A stale If-Range validator means the client must get the whole file
+    if range_header and request.headers.get("if-range", etag) == etag:
+        byte_range = parse_range(range_header, file_size)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(file_size)
+        return StreamingResponse(iter_file(path, 0, file_size), media_type=media_type_for(artifact_id), headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(iter_file(path, start, end - start + 1), status_code=206,
+                             media_type=media_type_for(artifact_id), headers=headers)
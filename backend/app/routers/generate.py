@@ -1,20 +1,28 @@
 from fastapi import APIRouter, Request, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
-from app.services.github_service import GitHubService
+from app.services.github_service import AsyncGitHubService, RepoContext
 from app.services.claude_service import ClaudeService
 from app.services.speech_service import SpeechService
 from app.services.openai_service import OpenAIService
+from app.services.mp3_utils import mp3_duration_seconds
+from app.services.webvtt import boundaries_to_webvtt
+from app.services.ssml import merge_ssml, iter_voice_blocks
+from app.services.content_packer import PromptSection, pack_sections
+from app.routers.artifacts import artifact_store
 from app.core.limiter import limiter
+from app.core.cache import create_cache
+from app.core.metrics import metrics
+from app.core.jobs import JobManager, QUEUED, TERMINAL_STATUSES
+from app.core.singleflight import SingleFlight
 import os
-from app.prompts import PODCAST_SSML_PROMPT_AFTER_BREAK, PODCAST_SSML_PROMPT, PODCAST_SSML_PROMPT_BEFORE_BREAK
+from app.prompts import PODCAST_SSML_SYSTEM_PROMPT, PODCAST_SSML_PROMPT_AFTER_BREAK, PODCAST_SSML_PROMPT, PODCAST_SSML_PROMPT_BEFORE_BREAK
 from anthropic._exceptions import RateLimitError
 from pydantic import BaseModel
-from functools import lru_cache
+import asyncio
+import hashlib
+import json
 import re
-from tempfile import NamedTemporaryFile
-import base64
-from pydub import AudioSegment
-import io
 import concurrent.futures
 from clerk_backend_api import Clerk
 from clerk_backend_api.jwks_helpers import authenticate_request, AuthenticateRequestOptions
@@ -25,11 +33,22 @@ load_dotenv()
 router = APIRouter(prefix="/generate", tags=["Claude"])
 
 # Initialize services
-github_service = GitHubService()
+github_service = AsyncGitHubService()
 claude_service = ClaudeService()
 speech_service = SpeechService()
 openai_service = OpenAIService()
 
+# Background podcast generation; job records are shared through the cache backend
+job_manager = JobManager(
+    create_cache("generation-jobs", default_ttl=float(os.getenv("JOB_TTL", str(24 * 3600))), shared=True),
+    max_workers=int(os.getenv("JOB_WORKERS", "4")),
+    max_runtime=float(os.getenv("JOB_MAX_RUNTIME", str(30 * 60))),
+)
+JOB_EVENTS_POLL_INTERVAL = 1.0
+
+# Identical generations in flight at the same time (viral repos) run only once
+generation_flight = SingleFlight(create_cache("generation-flight", shared=True))
+
 
 def is_signed_in(request: Request):
     sdk = Clerk(bearer_auth=os.getenv('CLERK_SECRET_KEY'))
@@ -40,110 +59,192 @@ def is_signed_in(request: Request):
     )
     return request_state.is_signed_in
 
-# cache github data for 5 minutes to avoid double API calls from cost and generate
-@lru_cache(maxsize=100)
-def get_cached_github_data(username: str, repo: str):
-    default_branch = github_service.get_default_branch(username, repo)
-    if not default_branch:
-        default_branch = "main"  # fallback value
+# cache repo snapshots so /generate/cost and /generate share one fetch; keyed by
+# head commit so a push to the repo naturally invalidates the entry
+repo_snapshot_cache = create_cache(
+    "repo-snapshot-v2",  # v2: "files" replaced the preformatted "file_content"
+    default_ttl=float(os.getenv("REPO_CACHE_TTL", "3600")),
+    max_bytes=int(os.getenv("REPO_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+    shared=True,
+)
+# "archive" streams one tarball per repo, "api" uses the tree + contents endpoints
+GITHUB_INGESTION_MODE = os.getenv("GITHUB_INGESTION_MODE", "archive")
+
+
+# Tokens of repository content sent with each script request; larger repos are trimmed to fit
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "100000"))
+# Each important file keeps this much before the file tree or README are cut below their floor
+FILE_FLOOR_TOKENS = 2000
+
+
+def format_file_content(fpath: str, content: str) -> str:
+    discuss_or_not = "- discuss this file." if '.md' not in fpath else ""
+    return f"FPATH: {fpath} {discuss_or_not} \n CONTENT:{content}"
+
+
+def tree_readme_sections(file_tree, readme) -> list[PromptSection]:
+    return [
+        PromptSection(f"FILE TREE: {file_tree}\n", priority=1, floor=PROMPT_TOKEN_BUDGET // 5),
+        PromptSection(f"README: {readme} ", priority=0, floor=PROMPT_TOKEN_BUDGET // 10),
+    ]
+
+
+def file_sections(files: dict[str, str]) -> list[PromptSection]:
+    """Sections for the important files, given most important first; the least important are trimmed first."""
+    rank = {fpath: index for index, fpath in enumerate(files)}
+    # Stable file order keeps the prompt prefix identical between runs, see openai_service.build_messages
+    return [PromptSection("IMPORTANT FILES: ", priority=-1)] + [
+        PromptSection(format_file_content(fpath, files[fpath]), priority=2 + rank[fpath], floor=FILE_FLOOR_TOKENS)
+        for fpath in sorted(files)
+    ]
+
+
+def pack_podcast_content(file_tree, readme, files: dict[str, str], audio_length) -> list[str]:
+    """
+    Packs the repository into the content of each script request, every one within PROMPT_TOKEN_BUDGET.
+
+    Short podcasts take one request. Long ones take two: the file tree and
+    README, and the important files.
+    """
+    if audio_length == 'short':
+        return [pack_sections(tree_readme_sections(file_tree, readme) + file_sections(files), PROMPT_TOKEN_BUDGET)]
+    return [
+        pack_sections(tree_readme_sections(file_tree, readme), PROMPT_TOKEN_BUDGET),
+        pack_sections(file_sections(files), PROMPT_TOKEN_BUDGET),
+    ]
+
 
-    file_tree = github_service.get_github_file_paths_as_list(username, repo)
-    readme = github_service.get_github_readme(username, repo)
-    file_content = ""
+async def fetch_github_data_from_api(ctx: RepoContext):
+    file_tree, readme = await asyncio.gather(
+        github_service.get_github_file_paths_as_list(ctx),
+        github_service.get_github_readme(ctx),
+    )
+
+    files = {}
     try:
-        file_list = openai_service.get_important_files(file_tree)
-        for fpath in file_list:
-            content = github_service.get_github_file_content(username, repo, fpath)
-            discuss_or_not = "- discuss this file." if '.md' not in fpath else ""
-            file_content += f"FPATH: {fpath} {discuss_or_not} \n CONTENT:{content[:50000]}"
+        file_list = await asyncio.to_thread(openai_service.get_important_files, file_tree)
+        contents = await github_service.get_github_files_content(ctx, file_list)
+        files = {fpath: contents[fpath] for fpath in file_list if fpath in contents}
     except Exception as e:
         print(f"Some error in getting github file content {e}. Proceeding.")
 
-    return {
-        "default_branch": default_branch,
-        "file_tree": file_tree,
-        "readme": readme,
-        "file_content": file_content
-    }
+    return file_tree, readme, files
 
-def process_github_content(content, speech_prompt, max_length, max_tokens=None):
-    content = content[:max_length]
-    print(content[-200:])
 
+async def fetch_github_data_from_archive(ctx: RepoContext):
+    archive = await github_service.get_repo_archive(ctx)
+    readme = archive.readme
+    if readme is None:
+        # The archive only holds root READMEs within its size limit; the API also finds
+        # .github/ and docs/ READMEs and raises "Repository not found." on a real 404
+        readme = await github_service.get_github_readme(ctx)
+
+    files = {}
     try:
-        token_count = claude_service.count_tokens(content)
-        print(f"TOKEN COUNT: {token_count}")
-        if max_tokens and token_count > max_tokens:
-            return {
-                "error": "Content is too large for analysis."
-            }
+        file_list = await asyncio.to_thread(openai_service.get_important_files, archive.file_tree)
+        contents = {fpath: archive.files[fpath] for fpath in file_list if fpath in archive.files}
+        # Files skipped by the archive reader (too large, over budget) fall back to the contents API
+        missing = [fpath for fpath in file_list if fpath not in archive.files]
+        if missing:
+            contents.update(await github_service.get_github_files_content(ctx, missing))
+        files = {fpath: contents[fpath] for fpath in file_list if fpath in contents}
     except Exception as e:
-        print(f"{e} Error in token count")
+        print(f"Some error in getting github file content {e}. Proceeding.")
+
+    return archive.file_tree, readme, files
 
-    with NamedTemporaryFile(delete=False, mode='w+', suffix='.txt') as temp_file:
-        temp_file.write(content)
-        temp_file_path = temp_file.name
 
+async def get_cached_github_data(username: str, repo: str):
+    ctx = await github_service.resolve_repo(username, repo)
     try:
-        ssml_response = speech_service.generate_ssml_with_retry([temp_file_path], speech_prompt)
-        print(ssml_response[-200:])
+        return await _get_cached_github_data(ctx)
     finally:
-        os.remove(temp_file_path)
+        metrics.observe("github_requests_per_generation", ctx.github_requests)
 
+
+def snapshot_key(ctx: RepoContext) -> str:
+    return f"{ctx.username.lower()}/{ctx.repo.lower()}@{ctx.head_sha}"
+
+
+async def _get_cached_github_data(ctx: RepoContext):
+    if ctx.head_sha:
+        cached = await repo_snapshot_cache.get(snapshot_key(ctx))
+        if cached is not None:
+            metrics.increment("repo_snapshot_cache_hits")
+            return cached
+    metrics.increment("repo_snapshot_cache_misses")
+
+    if GITHUB_INGESTION_MODE == "archive":
+        file_tree, readme, files = await fetch_github_data_from_archive(ctx)
+    else:
+        file_tree, readme, files = await fetch_github_data_from_api(ctx)
+
+    github_data = {
+        "default_branch": ctx.default_branch or "main",  # fallback value
+        "file_tree": file_tree,
+        "readme": readme,
+        # Important files, most important first
+        "files": files
+    }
+    # A snapshot without file contents means the fetch partly failed; don't keep it around.
+    # The key is built now because the archive fills in head_sha when resolution could not
+    if ctx.head_sha and files:
+        await repo_snapshot_cache.set(snapshot_key(ctx), github_data)
+    return github_data
+
+def generate_ssml_for_content(content, speech_prompt) -> str:
+    ssml_response = speech_service.generate_ssml_with_retry(content, PODCAST_SSML_SYSTEM_PROMPT, speech_prompt)
+    print(ssml_response[-200:])
     return ssml_response
 
 
-def generate_ssml_concurrently(file_tree, readme, file_content, audio_length) -> str | dict:
-    # Prepare the content
+def stream_github_content(content, speech_prompt):
+    """Yields voice blocks for already prepared content as the model writes them."""
+    return speech_service.stream_ssml_voice_blocks(content, PODCAST_SSML_SYSTEM_PROMPT, speech_prompt)
+
+
+def generate_ssml_concurrently(file_tree, readme, files, audio_length) -> str:
     if audio_length == 'short':
-        combined_content = f"FILE TREE: {file_tree}\nREADME: {readme} IMPORTANT FILES: {file_content}"
-        ssml_response = process_github_content(combined_content, PODCAST_SSML_PROMPT, 250000, 100000)
-        return ssml_response
-    else:
-        combined_content_tree_readme = f"FILE TREE: {file_tree}\nREADME: {readme}"
-        combined_content_file_content = f"IMPORTANT FILES: {file_content}"
-
-        # Define a function for error handling
-        def check_response(response):
-            if isinstance(response, dict):  # Check if it returns an error dictionary
-                return response
-            return None
-
-        # Use ThreadPoolExecutor to execute tasks concurrently
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future_tree_readme = executor.submit(
-                process_github_content,
-                combined_content_tree_readme,
-                PODCAST_SSML_PROMPT_BEFORE_BREAK,
-                250000,
-                100000
-            )
-            future_file_content = executor.submit(
-                process_github_content,
-                combined_content_file_content,
-                PODCAST_SSML_PROMPT_AFTER_BREAK,
-                250000,
-                100000
-            )
+        content, = pack_podcast_content(file_tree, readme, files, audio_length)
+        return generate_ssml_for_content(content, PODCAST_SSML_PROMPT)
 
-            ssml_response_tree_readme = future_tree_readme.result()
-            ssml_response_file_content = future_file_content.result()
+    content_tree_readme, content_files = pack_podcast_content(file_tree, readme, files, audio_length)
+    # Use ThreadPoolExecutor to execute tasks concurrently
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        future_tree_readme = executor.submit(
+            generate_ssml_for_content, content_tree_readme, PODCAST_SSML_PROMPT_BEFORE_BREAK)
+        future_file_content = executor.submit(
+            generate_ssml_for_content, content_files, PODCAST_SSML_PROMPT_AFTER_BREAK)
 
-            # Check for errors
-            error_response = check_response(ssml_response_tree_readme) or check_response(ssml_response_file_content)
-            if error_response:
-                return error_response
-        # Apply the function to remove the first occurrence of the <speak> tags from responses
-        ssml_response_tree_readme_content = speech_service.remove_first_speak_tag(ssml_response_tree_readme)
-        ssml_response_file_content_content = speech_service.remove_first_speak_tag(ssml_response_file_content)
-        # Combine the contents
-        combined_ssml_content = f"{ssml_response_tree_readme_content}\n{ssml_response_file_content_content}"
+        # Both halves are already normalized, so they are merged without another parse
+        return merge_ssml(future_tree_readme.result(), future_file_content.result())
 
-        # Wrap the combined content in a single <speak> tag
-        full_ssml_response = f'<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-US">{combined_ssml_content}</speak>'
 
-        # Proceed with ssml_response_tree_readme and ssml_response_file_content as needed
-        return full_ssml_response
+def stream_podcast_voice_blocks(file_tree, readme, files, audio_length):
+    """
+    Starts writing the podcast script and returns an iterator over its voice blocks.
+
+    The first part of the script is streamed from the model. For long podcasts
+    the second part is generated in the background at the same time and
+    follows once the first part is done.
+    """
+    if audio_length == 'short':
+        content, = pack_podcast_content(file_tree, readme, files, audio_length)
+        return stream_github_content(content, PODCAST_SSML_PROMPT)
+
+    content_tree_readme, content_files = pack_podcast_content(file_tree, readme, files, audio_length)
+
+    def voice_blocks():
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        try:
+            future_file_content = executor.submit(
+                generate_ssml_for_content, content_files, PODCAST_SSML_PROMPT_AFTER_BREAK)
+            yield from stream_github_content(content_tree_readme, PODCAST_SSML_PROMPT_BEFORE_BREAK)
+            yield from iter_voice_blocks(future_file_content.result())
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return voice_blocks()
 
 
 class ApiRequest(BaseModel):
@@ -155,62 +256,128 @@ class ApiRequest(BaseModel):
     audio_length: str = 'long'
 
 
+class GenerationError(Exception):
+    """Pipeline failure whose message can be shown to the user as is."""
+
+
+def validate_request(request: Request, body: ApiRequest):
+    if len(body.instructions) > 1000:
+        raise GenerationError("Instructions exceed maximum length of 1000 characters")
+
+    if body.audio_length == 'long' and not is_signed_in(request):
+        raise HTTPException(
+            status_code=401,
+            detail="Please sign in to access this resource"
+        )
+
+
+async def _no_stage(stage: str):
+    pass
+
+
+async def generate_podcast_script(body: ApiRequest, report_stage=_no_stage) -> str:
+    await report_stage("fetching_repository")
+    github_data = await get_cached_github_data(body.username, body.repo)
+    file_tree = github_data["file_tree"]
+    readme = github_data["readme"]
+    files = github_data["files"]
+
+    await report_stage("writing_script")
+    result = await asyncio.to_thread(generate_ssml_concurrently, file_tree, readme, files, body.audio_length)
+
+    print(result[-100:])
+    return result
+
+
+async def synthesize_podcast(ssml_response: str, report_stage=_no_stage) -> dict:
+    await report_stage("synthesizing_audio")
+    synthesis = await asyncio.to_thread(speech_service.synthesize_chunked, ssml_response)
+    if not synthesis or not synthesis.audio:
+        raise GenerationError("Text to speech is not available. Please set Azure speech credentials in .env E002")
+
+    await report_stage("writing_captions")
+    # Artifacts are several MB; write them off the event loop
+    audio_id = await asyncio.to_thread(artifact_store.put, synthesis.audio, "mp3")
+    duration_in_seconds = mp3_duration_seconds(synthesis.audio)
+    print("duration in sec", duration_in_seconds)
+    if synthesis.word_boundaries:
+        vtt_content = boundaries_to_webvtt(synthesis.word_boundaries)
+    else:
+        vtt_content = speech_service.ssml_to_webvtt(ssml_response, duration_in_seconds)
+
+    # Captions are stored next to the audio and fetched from their own URL
+    vtt_id = await asyncio.to_thread(artifact_store.put, vtt_content.encode("utf-8"), "vtt")
+
+    return {
+        "audio_id": audio_id,
+        "vtt_id": vtt_id,
+        "duration": duration_in_seconds,
+    }
+
+
+def generation_key(body: ApiRequest) -> str:
+    identity = [body.username.lower(), body.repo.lower(), body.audio_length, body.instructions]
+    return hashlib.sha256(json.dumps(identity).encode("utf-8")).hexdigest()
+
+
+async def run_podcast_pipeline(body: ApiRequest, report_stage=_no_stage) -> dict:
+    """
+    Runs the full podcast pipeline. Concurrent requests for the same repo,
+    audio length and instructions share a single run; only the first
+    caller's stages are reported.
+    """
+    async def pipeline():
+        ssml_response = await generate_podcast_script(body, report_stage)
+        return await synthesize_podcast(ssml_response, report_stage)
+
+    return await generation_flight.do(generation_key(body), pipeline)
+
+
 # @limiter.limit("1/minute;5/day") # TEMP: disable rate limit for growth??
 @router.post("")
 async def generate(request: Request, body: ApiRequest):
     try:
-        if len(body.instructions) > 1000:
-            return {"error": "Instructions exceed maximum length of 1000 characters"}
-
-        audio_length = body.audio_length
-
-        if audio_length == 'long' and not is_signed_in(request):
-            raise HTTPException(
-                status_code=401,
-                detail="Please sign in to access this resource"
-            )
-        github_data = get_cached_github_data(body.username, body.repo)
-        default_branch = github_data["default_branch"]
-        file_tree = github_data["file_tree"]
-        readme = github_data["readme"]
-        file_content = github_data["file_content"]
-
-        result = generate_ssml_concurrently(file_tree, readme, file_content, audio_length)
-        # Check if there was an error response
-        if isinstance(result, dict):  # There was an error
-            print("Error in processing:")
-            for error in result.get("errors", []):
-                print(error)
-            return {"error": "Some error in genererating audio: E001"}
-        else:
-            # Successful processing
-            full_ssml_response = result
-
-        print(full_ssml_response[-100:])
-        ssml_response = full_ssml_response
-
+        validate_request(request, body)
         if not body.audio:
+            await generate_podcast_script(body)
             return {"diagram": "flowchart TB\n    subgraph Input\n        CLI[CLI Interface]:::input\n        API[API Interface]:::input\n    end\n\n    subgraph Orchestration\n        TM[Task Manager]:::core\n        PR[Platform Router]:::core\n    end\n\n    subgraph \"Planning Layer\"\n        TP[Task Planning]:::core\n        subgraph Planners\n            OP[OpenAI Planner]:::planner\n            GP[Gemini Planner]:::planner\n            LP[Local Ollama Planner]:::planner\n        end\n    end\n\n    subgraph \"Finding Layer\"\n        subgraph Finders\n            OF[OpenAI Finder]:::finder\n            GF[Gemini Finder]:::finder\n            LF[Local Ollama Finder]:::finder\n            MF[MLX Finder]:::finder\n        end\n    end\n\n    subgraph \"Execution Layer\"\n        AE[Android Executor]:::executor\n        OE[OSX Executor]:::executor\n    end\n\n    subgraph \"External Services\"\n        direction TB\n        OAPI[OpenAI API]:::external\n        GAPI[Google Gemini API]:::external\n        LAPI[Local Ollama Instance]:::external\n    end\n\n    subgraph \"Platform Tools\"\n        direction TB\n        ADB[Android Debug Bridge]:::platform\n        OSX[OSX System Tools]:::platform\n    end\n\n    subgraph \"Configuration\"\n        direction TB\n        MS[Model Settings]:::config\n        FD[Function Declarations]:::config\n        SP[System Prompts]:::config\n    end\n\n    %% Connections\n    CLI --> TM\n    API --> TM\n    TM --> PR\n    PR --> TP\n    TP --> Planners\n    Planners --> Finders\n    Finders --> AE & OE\n    \n    %% External Service Connections\n    OP & OF -.-> OAPI\n    GP & GF -.-> GAPI\n    LP & LF -.-> LAPI\n    \n    %% Platform Tool Connections\n    AE --> ADB\n    OE --> OSX\n    \n    %% Configuration Connections\n    MS -.-> TM\n    FD -.-> PR\n    SP -.-> TP\n\n    %% Click Events\n    click CLI \"https://github.com/BandarLabs/clickclickclick/blob/main/main.py\"\n    click API \"https://github.com/BandarLabs/clickclickclick/blob/main/api.py\"\n    click MS \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/config/models.yaml\"\n    click FD \"https://github.com/BandarLabs/clickclickclick/tree/main/clickclickclick/config/function_declarations\"\n    click SP \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/config/prompts.yaml\"\n    click OP \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/planner/openai.py\"\n    click GP \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/planner/gemini.py\"\n    click LP \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/planner/local_ollama.py\"\n    click TP \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/planner/task.py\"\n    click OF \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/finder/openai.py\"\n    click GF \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/finder/gemini.py\"\n    click LF \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/finder/local_ollama.py\"\n    click MF \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/finder/mlx.py\"\n    click AE \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/executor/android.py\"\n    click OE \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/executor/osx.py\"\n\n    %% Styles\n    classDef input fill:#87CEEB,stroke:#333,stroke-width:2px\n    classDef core fill:#4169E1,stroke:#333,stroke-width:2px\n    classDef planner fill:#6495ED,stroke:#333,stroke-width:2px\n    classDef finder fill:#4682B4,stroke:#333,stroke-width:2px\n    classDef executor fill:#1E90FF,stroke:#333,stroke-width:2px\n    classDef external fill:#98FB98,stroke:#333,stroke-width:2px\n    classDef platform fill:#FFA500,stroke:#333,stroke-width:2px\n    classDef config fill:#D3D3D3,stroke:#333,stroke-width:2px",
                     "explanation": 'EXPLANATION'}
-        else:
 
-            audio_bytes = speech_service.text_to_mp3(ssml_response)
+        podcast = await run_podcast_pipeline(body)
+        audio_bytes = await asyncio.to_thread(artifact_store.read, podcast["audio_id"])
 
-            if audio_bytes:
-                response = Response(content=audio_bytes, media_type="audio/mpeg", headers={"Content-Disposition": "attachment; filename=explanation.mp3"})
+        response = Response(content=audio_bytes, media_type="audio/mpeg", headers={"Content-Disposition": "attachment; filename=explanation.mp3"})
+        # The stored copy supports range requests and long-lived caching; the URLs are paths
+        # because behind the proxy the backend does not know its public scheme and host
+        response.headers["X-Audio-Id"] = podcast["audio_id"]
+        response.headers["X-Audio-Url"] = str(request.app.url_path_for("get_artifact", artifact_id=podcast["audio_id"]))
+        response.headers["X-VTT-Id"] = podcast["vtt_id"]
+        response.headers["X-VTT-Url"] = str(request.app.url_path_for("get_artifact", artifact_id=podcast["vtt_id"]))
 
-                audio = AudioSegment.from_file(io.BytesIO(audio_bytes), format="mp3")
-                duration_in_seconds = len(audio) / 1000.0
-                print("duration in sec", duration_in_seconds)
-                vtt_content = speech_service.ssml_to_webvtt(ssml_response, duration_in_seconds)
-                encoded_vtt_content = base64.b64encode(vtt_content.encode('utf-8')).decode('utf-8')
-                response.headers["X-VTT-Content"] = encoded_vtt_content
+        response.headers["Access-Control-Expose-Headers"] = "X-Audio-Id, X-Audio-Url, X-VTT-Id, X-VTT-Url"
+        response.headers["Access-Control-Allow-Origin"] = "*"
+        return response
+    except RateLimitError as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Service is currently experiencing high demand. Please try again in a few minutes."
+        )
+    except Exception as e:
+        return {"error": str(e)}
 
-                response.headers["Access-Control-Expose-Headers"] = "X-VTT-Content"
-                response.headers["Access-Control-Allow-Origin"] = "*"
-                return response
-            else:
-                return {"error": "Text to speech is not available. Please set Azure speech credentials in .env E002"}
+
+@router.post("/stream")
+async def stream_generation(request: Request, body: ApiRequest):
+    """
+    Streams the podcast as chunked MP3 while the script is still being written
+    and later parts are still being synthesized.
+    """
+    try:
+        validate_request(request, body)
+        github_data = await get_cached_github_data(body.username, body.repo)
+        voice_blocks = await asyncio.to_thread(
+            stream_podcast_voice_blocks, github_data["file_tree"], github_data["readme"],
+            github_data["files"], body.audio_length)
     except RateLimitError as e:
         raise HTTPException(
             status_code=429,
@@ -219,19 +386,76 @@ async def generate(request: Request, body: ApiRequest):
     except Exception as e:
         return {"error": str(e)}
 
+    if not speech_service.backend.available:
+        return {"error": "Text to speech is not available. Please set Azure speech credentials in .env E002"}
+
+    return StreamingResponse(
+        speech_service.iter_mp3_from_voice_blocks(voice_blocks),
+        media_type="audio/mpeg",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Access-Control-Allow-Origin": "*"},
+    )
+
+
+@router.post("/jobs", status_code=202)
+async def create_generation_job(request: Request, body: ApiRequest):
+    try:
+        validate_request(request, body)
+    except GenerationError as e:
+        return {"error": str(e)}
+
+    async def pipeline(report_stage):
+        podcast = await run_podcast_pipeline(body, report_stage)
+        podcast["audio_url"] = str(request.app.url_path_for("get_artifact", artifact_id=podcast["audio_id"]))
+        podcast["vtt_url"] = str(request.app.url_path_for("get_artifact", artifact_id=podcast["vtt_id"]))
+        return podcast
+
+    job_id = await job_manager.submit(pipeline)
+    return {"job_id": job_id, "status": QUEUED}
+
+
+@router.get("/jobs/{job_id}")
+async def get_generation_job(job_id: str):
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_generation_job(job_id: str):
+    if await job_manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        last_update = None
+        while True:
+            job = await job_manager.get(job_id)
+            if job is None:
+                return
+            if (job["status"], job["stage"]) != last_update:
+                last_update = (job["status"], job["stage"])
+                yield f"data: {json.dumps(job)}\n\n"
+            if job["status"] in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(JOB_EVENTS_POLL_INTERVAL)
+
+    # Disable nginx buffering so events reach the client as they happen
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 
 @router.post("/cost")
 # @limiter.limit("5/minute") # TEMP: disable rate limit for growth??
 async def get_generation_cost(request: Request, body: ApiRequest):
     try:
         # Get file tree and README content
-        github_data = get_cached_github_data(body.username, body.repo)
+        github_data = await get_cached_github_data(body.username, body.repo)
         file_tree = github_data["file_tree"]
         readme = github_data["readme"]
 
         # Calculate combined token count
-        file_tree_tokens = claude_service.count_tokens(file_tree)
-        readme_tokens = claude_service.count_tokens(readme)
+        # An estimate is all the price needs, so the texts are not tokenized
+        file_tree_tokens, readme_tokens = claude_service.count_tokens_batch([file_tree, readme], approximate=True)
 
         # Calculate approximate cost
         # Input cost: $3 per 1M tokens ($0.000003 per token)
@@ -0,0 +1,144 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+
+# Artifacts are addressed by the SHA-256 of their content plus a file extension
+ARTIFACT_ID_PATTERN = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]+$")
+
+MEDIA_TYPES = {
+    "mp3": "audio/mpeg",
+    "vtt": "text/vtt",
+}
+
+
+class ArtifactStore:
+    """
+    Content-addressed on-disk store for generated podcast artifacts.
+
+    Files are immutable once written, which lets them be served with strong
+    ETags and long-lived cache headers. Identical audio is stored only once.
+
+    Retention: every store or download refreshes an artifact's mtime, and a
+    sweep after writes (at most every `sweep_interval` seconds) removes
+    artifacts unused for `max_age` seconds, then the least recently used
+    ones until the store is within `max_bytes`.
+
+    Args:
+        directory (str | None): Root directory, ARTIFACT_DIR by default
+        max_age (float | None): Seconds an unused artifact is kept, ARTIFACT_TTL by default
+        max_bytes (int | None): Size bound of the store, ARTIFACT_MAX_BYTES by default
+        sweep_interval (float): Minimum seconds between two sweeps
+    """
+
+    def __init__(self, directory: str | None = None, max_age: float | None = None, max_bytes: int | None = None,
+                 sweep_interval: float = 600):
+        self.directory = directory or os.getenv("ARTIFACT_DIR", os.path.join(os.getcwd(), "data", "artifacts"))
+        self.max_age = max_age if max_age is not None else float(os.getenv("ARTIFACT_TTL", str(7 * 24 * 3600)))
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            os.getenv("ARTIFACT_MAX_BYTES", str(10 * 1024 * 1024 * 1024)))
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+        self._sweep_lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def put(self, data: bytes, extension: str) -> str:
+        """
+        Stores `data` and returns its artifact id.
+
+        Args:
+            data (bytes): File contents
+            extension (str): File extension without the dot, e.g. "mp3"
+
+        Returns:
+            str: Artifact id of the form "<sha256>.<extension>"
+        """
+        artifact_id = f"{hashlib.sha256(data).hexdigest()}.{extension}"
+        path = self._path(artifact_id)
+        if self.touch(artifact_id):
+            return artifact_id
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so readers never see a partial artifact
+        with tempfile.NamedTemporaryFile("wb", dir=os.path.dirname(path), delete=False, suffix=".tmp") as f:
+            f.write(data)
+        os.replace(f.name, path)
+        self._maybe_sweep()
+        return artifact_id
+
+    def touch(self, artifact_id: str) -> bool:
+        """Marks an artifact as recently used; returns False when it does not exist."""
+        try:
+            os.utime(self._path(artifact_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def sweep(self):
+        """Removes expired artifacts, then the least recently used ones while over max_bytes."""
+        now = time.time()
+        artifacts, total = [], 0
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not ARTIFACT_ID_PATTERN.match(entry.name):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if self.max_age and now - stat.st_mtime > self.max_age:
+                    self._remove(entry.path)
+                    continue
+                artifacts.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        for _, size, path in sorted(artifacts):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _maybe_sweep(self):
+        with self._sweep_lock:
+            if time.time() - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = time.time()
+        self.sweep()
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def path(self, artifact_id: str) -> str | None:
+        """Returns the file path of an existing artifact, None for unknown or malformed ids."""
+        if not ARTIFACT_ID_PATTERN.match(artifact_id):
+            return None
+        path = self._path(artifact_id)
+        return path if os.path.exists(path) else None
+
+    def read(self, artifact_id: str) -> bytes | None:
+        """Returns the contents of an existing artifact, None for unknown or malformed ids."""
+        path = self.path(artifact_id)
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _path(self, artifact_id: str) -> str:
+        # Shard by the first two hex digits to keep directories small
+        return os.path.join(self.directory, artifact_id[:2], artifact_id)
+
+
+def media_type_for(artifact_id: str) -> str:
+    return MEDIA_TYPES.get(artifact_id.rsplit(".", 1)[-1], "application/octet-stream")
+
+
+def digest_of(artifact_id: str) -> str:
+    return artifact_id.split(".", 1)[0]
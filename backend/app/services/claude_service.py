@@ -1,17 +1,17 @@
 import os
-import os
 import openai
 from dotenv import load_dotenv
-import tiktoken
+from app.services.token_counter import token_counter
 
 load_dotenv()
 
+# For chat models, tokens come from structured messages; this assumes a single 'user' message
+TOKENS_PER_MESSAGE = 3  # role + content formatting
+
 class ClaudeService:
     def __init__(self):
-        # Retrieve necessary Azure OpenAI API setup from environment variables
-        openai.api_type = "openai"  # azure / openai
-        openai.api_version = "2024-10-21"
-        openai.api_key = os.environ["OPENAI_API_KEY"]  # use openai key for openai api
+        # A client instance instead of module-level openai settings, so services don't share state
+        self.client = openai.OpenAI(api_key=os.environ["OPENAI_API_KEY"])
         # Model name should match your Azure configuration
         self.model_name = "gpt-4o"
 
@@ -34,7 +34,7 @@ class ClaudeService:
         # Create the user message with the data
         user_message = self._format_user_message(data)
 
-        response = openai.chat.completions.create(
+        response = self.client.chat.completions.create(
             model=self.model_name,
             max_tokens=4096,
             temperature=0,
@@ -71,25 +71,19 @@ class ClaudeService:
     # autopep8: on
 
 
-    def count_tokens(self, prompt: str) -> int:
+    def count_tokens(self, prompt: str, approximate: bool = False) -> int:
         """
         Count the number of tokens in a prompt using OpenAI-compatible tokenizer.
 
         Args:
             prompt (str): The prompt text
-            model (str): OpenAI model name, e.g., "gpt-3.5-turbo", "gpt-4"
+            approximate (bool): Estimate from the length instead of tokenizing
 
         Returns:
             int: Number of tokens in the prompt
         """
-        try:
-            encoding = tiktoken.encoding_for_model(self.model)
-        except KeyError:
-            encoding = tiktoken.get_encoding("cl100k_base")  # fallback encoding
-
-        # For chat models, tokens come from structured messages; this assumes a single 'user' message
-        tokens_per_message = 3  # role + content formatting
-        tokens_per_name = 1     # if "name" is present
+        return TOKENS_PER_MESSAGE + token_counter.count(prompt, approximate)
 
-        num_tokens = tokens_per_message + len(encoding.encode(prompt))
-        return num_tokens
+    def count_tokens_batch(self, prompts: list[str], approximate: bool = False) -> list[int]:
+        """Counts several prompts at once, see count_tokens."""
+        return [TOKENS_PER_MESSAGE + count for count in token_counter.count_batch(prompts, approximate)]
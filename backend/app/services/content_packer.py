@@ -0,0 +1,81 @@
+from dataclasses import dataclass
+from app.core.metrics import metrics
+from app.services.token_counter import get_encoding
+
+TRUNCATION_MARKER = "\n... [truncated]\n"
+# A section trimmed below this many tokens says too little to be worth keeping
+MIN_SECTION_TOKENS = 200
+
+
+@dataclass
+class PromptSection:
+    """
+    One part of a prompt, such as the file tree or a single file.
+
+    Args:
+        text (str): Section text including its heading
+        priority (int): Lower numbers are kept longest
+        floor (int): Tokens the section keeps until every other section is down
+            to its own floor; either 0 or at least MIN_SECTION_TOKENS
+    """
+    text: str
+    priority: int
+    floor: int = 0
+
+
+def pack_sections(sections: list[PromptSection], budget: int, model: str = "gpt-4o") -> str:
+    """
+    Joins the sections, trimming them until the result fits in `budget` tokens.
+
+    Nothing is trimmed when everything fits. Otherwise the lowest priority
+    sections give up tokens first, in two rounds: sections with a floor down
+    to it, then every section down to nothing. A trimmed section keeps its
+    beginning (the heading and, for code, the imports and first definitions)
+    followed by a marker; one left with fewer than MIN_SECTION_TOKENS is
+    dropped. Sections stay in their given order, only the trimming follows
+    priority.
+    """
+    encoding = get_encoding(model)
+    # Repository files may contain special token text, which is plain text here
+    tokens = [encoding.encode_ordinary(section.text) for section in sections]
+    marker_tokens = len(encoding.encode_ordinary(TRUNCATION_MARKER))
+    keep = [len(section_tokens) for section_tokens in tokens]
+    # Lowest priority first; among equals the later section goes first
+    order = sorted(range(len(sections)), key=lambda i: (-sections[i].priority, -i))
+
+    def cost(i, kept):
+        return kept + marker_tokens if 0 < kept < len(tokens[i]) else kept
+
+    text = "".join(section.text for section in sections)
+    total_tokens = len(encoding.encode_ordinary(text))
+    excess = total_tokens - budget
+    # Adjacent sections rarely encode differently joined than apart, so the result is counted again
+    while excess > 0:
+        for floor_round in (True, False):
+            for i in order:
+                if excess <= 0:
+                    break
+                floor = sections[i].floor if floor_round else 0
+                if floor_round and not floor:
+                    # Sections without a floor wait for the second round, in priority order
+                    continue
+                target = max(keep[i] - excess - (marker_tokens if keep[i] == len(tokens[i]) else 0), floor)
+                if target >= keep[i]:
+                    continue
+                if target < MIN_SECTION_TOKENS:
+                    target = 0
+                excess -= cost(i, keep[i]) - cost(i, target)
+                keep[i] = target
+
+        text = "".join(
+            section.text if kept == len(section_tokens)
+            else encoding.decode(section_tokens[:kept]) + TRUNCATION_MARKER if kept
+            else ""
+            for section, section_tokens, kept in zip(sections, tokens, keep)
+        )
+        packed_tokens = len(encoding.encode_ordinary(text))
+        excess = packed_tokens - budget
+        if excess <= 0:
+            print(f"Trimmed prompt from {total_tokens} to {packed_tokens} tokens")
+            metrics.observe("prompt_tokens_trimmed", total_tokens - packed_tokens)
+    return text
@@ -2,6 +2,7 @@ import os
 import time
 from dotenv import load_dotenv
 import google.generativeai as genai
+from app.services.llm_content import content_to_text
 
 
 #os.environ["HTTP_PROXY"] = "http://127.0.0.1:7897"
@@ -44,22 +45,21 @@ class GeminiService:
         print("...all files ready")
         print()
 
-    def call_gemini_flash_for_ssml(self, file_paths, ssml_prompt):
+    def call_gemini_flash_for_ssml(self, content, ssml_prompt, instructions=""):
         """
         Calls the Gemini Flash API to generate SSML based on a given prompt.
 
+        The content is sent inline as text; `upload_to_gemini` is only needed
+        for media the API cannot take inline.
+
         Args:
-            file_paths (list): List of paths to files to upload.
+            content (str | bytes | file-like): Repository content the podcast is about.
             ssml_prompt (str): SSML template or prompt to instruct the model.
+            instructions (str): Request specific instructions, sent after the content.
 
         Returns:
             str: The generated SSML text.
         """
-        files = [self.upload_to_gemini(path, mime_type="text/plain") for path in file_paths]
-
-        # Some files have a processing delay. Wait for them to be ready.
-        self.wait_for_files_active(files)
-
         # Configure model generation properties
         generation_config = {
             "temperature": 1,
@@ -80,9 +80,9 @@ class GeminiService:
             history=[
                 {
                     "role": "user",
+                    # Static prompt first and instructions last, so the prefix can be cached
                     "parts": [
-                        files[0],
-                        ssml_prompt,
+                        part for part in (ssml_prompt, content_to_text(content), instructions) if part
                     ],
                 },
             ]
@@ -96,22 +96,18 @@ class GeminiService:
 # Example usage
 if __name__ == "__main__":
     ssml_prompt = """Can you convert it into a podcast so that someone could listen to it and understand what's going on - make it a ssml similar to this: <speak version=\"1.0\" xmlns=\"http://www.w3.org/2001/10/synthesis\" xml:lang=\"en-US\">\n<voice name=\"en-US-AvaMultilingualNeural\">\nWelcome to Next Gen Innovators!  (no need to open links) .. also make it a conversation between host and guest of a podcast, question answer kind. \n\n<break time=\"500ms\" />\nI’m your host, Ava, and today we’re diving into an exciting topic: how students can embark on their entrepreneurial journey right from college.\n<break time=\"700ms\" />\nJoining us is Arun Sharma, a seasoned entrepreneur with over two decades of experience and a passion for mentoring young innovators.\n<break time=\"500ms\" />\nArun, it’s a pleasure to have you here.\n</voice>\n\n<voice name=\"en-US-BrianMultilingualNeural\">\n    Thank you, Ava.\n    <break time=\"300ms\" />\n    It’s great to be here. I’m excited to talk about how students can channel their creativity and energy into building impactful ventures.\n</voice> ..\n","""
-    file_paths = ["/Users/manish/Downloads/ahmedkhaleel2004-gitdiagram.txt"]
+    with open("/Users/manish/Downloads/ahmedkhaleel2004-gitdiagram.txt") as f:
+        content = f.read()
     gemini_service = GeminiService()
-    ssml_response = gemini_service.call_gemini_flash_for_ssml(file_paths, ssml_prompt)
+    ssml_response = gemini_service.call_gemini_flash_for_ssml(content, ssml_prompt)
     print(ssml_response)
 '''
 
 if __name__ == "__main__":
     ssml_prompt = """Can you convert it into a podcast so that someone could listen to it and understand what's going on - make it a ssml similar to this: <speak version=\"1.0\" xmlns=\"http://www.w3.org/2001/10/synthesis\" xml:lang=\"en-US\">\n<voice name=\"en-US-AvaMultilingualNeural\">\nWelcome to Next Gen Innovators!  (no need to open links) .. also make it a conversation between host and guest of a podcast, question answer kind. \n\n<break time=\"500ms\" />\nI’m your host, Ava, and today we’re diving into an exciting topic: how students can embark on their entrepreneurial journey right from college.\n<break time=\"700ms\" />\nJoining us is Arun Sharma, a seasoned entrepreneur with over two decades of experience and a passion for mentoring young innovators.\n<break time=\"500ms\" />\nArun, it’s a pleasure to have you here.\n</voice>\n\n<voice name=\"en-US-BrianMultilingualNeural\">\n    Thank you, Ava.\n    <break time=\"300ms\" />\n    It’s great to be here. I’m excited to talk about how students can channel their creativity and energy into building impactful ventures.\n</voice> ..\n","""
     
-    # 创建测试文件
-    test_path = "test_gemini_input.txt"
-    with open(test_path, "w", encoding="utf-8") as f:
-        f.write("This is a sample GitHub project description to test Gemini SSML generation.")
-
-    file_paths = [test_path]
+    content = "This is a sample GitHub project description to test Gemini SSML generation."
 
     gemini_service = GeminiService()
-    ssml_response = gemini_service.call_gemini_flash_for_ssml(file_paths, ssml_prompt)
+    ssml_response = gemini_service.call_gemini_flash_for_ssml(content, ssml_prompt)
     print(ssml_response)
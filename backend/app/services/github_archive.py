@@ -0,0 +1,197 @@
+import zlib
+from dataclasses import dataclass, field
+
+BLOCK_SIZE = 512
+
+# Preferred README names, in the order GitHub itself picks them
+README_NAMES = ["readme.md", "readme.markdown", "readme.rst", "readme.txt", "readme"]
+
+
+@dataclass
+class RepoArchive:
+    """File listing and selected file contents extracted from a repository tarball."""
+    commit_sha: str | None = None
+    paths: list[str] = field(default_factory=list)
+    files: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def file_tree(self) -> str:
+        return "\n".join(self.paths)
+
+    @property
+    def readme(self) -> str | None:
+        root_readmes = {path.lower(): path for path in self.files if "/" not in path and path.lower().startswith("readme")}
+        for name in README_NAMES:
+            if name in root_readmes:
+                return self.files[root_readmes[name]]
+        for path in root_readmes.values():
+            return self.files[path]
+        return None
+
+
+class TarStreamReader:
+    """
+    Incremental reader for a gzipped tar stream such as the GitHub tarball endpoint.
+
+    Chunks are fed in as they arrive from the network; only the headers and the
+    bodies of kept files are held in memory, everything else is skipped as it
+    streams past.
+
+    Args:
+        include_path (callable): Returns True for paths that belong in the listing.
+        max_file_bytes (int): Files larger than this are listed but not extracted.
+        max_total_bytes (int): Upper bound on the extracted content held in memory.
+    """
+
+    def __init__(self, include_path, max_file_bytes=200_000, max_total_bytes=16_000_000):
+        self.include_path = include_path
+        self.max_file_bytes = max_file_bytes
+        self.max_total_bytes = max_total_bytes
+        self.archive = RepoArchive()
+
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self._buffer = bytearray()
+        self._retained_bytes = 0
+        self._done = False
+
+        # State of the entry currently being read
+        self._entry = None       # (kind, path) or None while waiting for a header
+        self._remaining = 0      # body bytes still to read for the current entry
+        self._padding = 0        # zero padding after the body
+        self._body = None        # bytearray when the body is kept, None when skipped
+        self._pax_path = None    # path override from a preceding pax/GNU header
+
+    def feed(self, chunk: bytes):
+        if self._done:
+            return
+        self._buffer += self._decompressor.decompress(chunk)
+        self._process()
+
+    def close(self) -> RepoArchive:
+        if not self._done:
+            self._buffer += self._decompressor.flush()
+            self._process()
+        return self.archive
+
+    def _process(self):
+        while not self._done:
+            if self._entry is None:
+                if len(self._buffer) < BLOCK_SIZE:
+                    return
+                header = bytes(self._buffer[:BLOCK_SIZE])
+                del self._buffer[:BLOCK_SIZE]
+                self._read_header(header)
+                continue
+
+            if self._remaining:
+                take = min(self._remaining, len(self._buffer))
+                if not take:
+                    return
+                if self._body is not None:
+                    self._body += self._buffer[:take]
+                del self._buffer[:take]
+                self._remaining -= take
+                if self._remaining:
+                    return
+
+            if self._padding:
+                take = min(self._padding, len(self._buffer))
+                del self._buffer[:take]
+                self._padding -= take
+                if self._padding:
+                    return
+
+            self._finish_entry()
+
+    def _read_header(self, header: bytes):
+        if header == bytes(BLOCK_SIZE):
+            # An empty block marks the end of the archive
+            self._done = True
+            return
+
+        name = _cstring(header[0:100])
+        size = _parse_size(header[124:136])
+        typeflag = header[156:157] or b"0"
+        if header[257:262] == b"ustar":
+            prefix = _cstring(header[345:500])
+            if prefix:
+                name = f"{prefix}/{name}"
+
+        if typeflag in (b"x", b"g", b"L"):
+            kind = typeflag.decode()
+            path = None
+            keep = True
+        else:
+            kind = "dir" if typeflag == b"5" else "file" if typeflag in (b"0", b"\0", b"7") else "other"
+            path = _strip_root(self._pax_path or name)
+            self._pax_path = None
+            keep = kind == "file" and self._should_extract(path, size)
+            if path and kind != "other" and self.include_path(path):
+                self.archive.paths.append(path)
+
+        self._entry = (kind, path)
+        self._remaining = size
+        self._padding = -size % BLOCK_SIZE
+        self._body = bytearray() if keep else None
+
+    def _should_extract(self, path, size):
+        if not path or size > self.max_file_bytes:
+            return False
+        if "/" not in path and path.lower().startswith("readme"):
+            return True
+        return self.include_path(path) and self._retained_bytes + size <= self.max_total_bytes
+
+    def _finish_entry(self):
+        kind, path = self._entry
+        body = self._body
+        self._entry = None
+        self._body = None
+        if body is None:
+            return
+
+        if kind == "g":
+            # git archive stores the commit id in the global pax header
+            records = _parse_pax(body)
+            self.archive.commit_sha = records.get("comment", self.archive.commit_sha)
+        elif kind == "x":
+            self._pax_path = _parse_pax(body).get("path")
+        elif kind == "L":
+            self._pax_path = _cstring(body)
+        elif b"\0" not in body:
+            try:
+                self.archive.files[path] = body.decode("utf-8")
+                self._retained_bytes += len(body)
+            except UnicodeDecodeError:
+                pass
+
+
+def _cstring(data) -> str:
+    return bytes(data).split(b"\0", 1)[0].decode("utf-8", errors="replace")
+
+
+def _parse_size(field: bytes) -> int:
+    if field[0] & 0x80:
+        # GNU base-256 encoding for very large files
+        return int.from_bytes(field[1:], "big")
+    digits = field.split(b"\0", 1)[0].strip()
+    return int(digits, 8) if digits else 0
+
+
+def _parse_pax(data) -> dict[str, str]:
+    records = {}
+    data = bytes(data)
+    pos = 0
+    while pos < len(data):
+        space = data.find(b" ", pos)
+        if space == -1:
+            break
+        length = int(data[pos:space])
+        key, _, value = data[space + 1:pos + length - 1].partition(b"=")
+        records[key.decode("utf-8")] = value.decode("utf-8", errors="replace")
+        pos += length
+    return records
+
+
+def _strip_root(path: str) -> str:
+    # GitHub tarballs wrap everything in a single "{owner}-{repo}-{sha}/" directory
+    return path.split("/", 1)[1].rstrip("/") if "/" in path else ""
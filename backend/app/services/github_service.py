@@ -1,14 +1,39 @@
 import requests
+import httpx
+import asyncio
 import jwt
 import time
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import os
+from dataclasses import dataclass
 from base64 import b64decode
+from app.services.github_archive import TarStreamReader
+from app.core.cache import create_cache
 
 load_dotenv()
 
 
+def should_include_file(path):
+    # Patterns to exclude
+    excluded_patterns = [
+        # Dependencies
+        'node_modules/', 'vendor/', 'venv/',
+        # Compiled files
+        '.min.', '.pyc', '.pyo', '.pyd', '.so', '.dll', '.class',
+        # Asset files
+        '.jpg', '.jpeg', '.png', '.gif', '.ico', '.svg', '.ttf', '.woff', '.webp',
+        # Cache and temporary files
+        '__pycache__/', '.cache/', '.tmp/',
+        # Lock files and logs
+        'yarn.lock', 'poetry.lock', '*.log',
+        # Configuration files
+        '.vscode/', '.idea/'
+    ]
+
+    return not any(pattern in path.lower() for pattern in excluded_patterns)
+
+
 class GitHubService:
     def __init__(self):
         # Try app authentication first
@@ -98,25 +123,6 @@ class GitHubService:
         Returns:
             str: A filtered and formatted string of file paths in the repository, one per line.
         """
-        def should_include_file(path):
-            # Patterns to exclude
-            excluded_patterns = [
-                # Dependencies
-                'node_modules/', 'vendor/', 'venv/',
-                # Compiled files
-                '.min.', '.pyc', '.pyo', '.pyd', '.so', '.dll', '.class',
-                # Asset files
-                '.jpg', '.jpeg', '.png', '.gif', '.ico', '.svg', '.ttf', '.woff', '.webp',
-                # Cache and temporary files
-                '__pycache__/', '.cache/', '.tmp/',
-                # Lock files and logs
-                'yarn.lock', 'poetry.lock', '*.log',
-                # Configuration files
-                '.vscode/', '.idea/'
-            ]
-
-            return not any(pattern in path.lower() for pattern in excluded_patterns)
-
         # Try to get the default branch first
         branch = self.get_default_branch(username, repo)
         if branch:
@@ -195,6 +201,305 @@ class GitHubService:
         return file_content
 
 
+@dataclass
+class RepoContext:
+    """Repository metadata resolved once per generation and shared by the async fetchers."""
+    username: str
+    repo: str
+    default_branch: str | None = None
+    head_sha: str | None = None
+    tree: str | None = None
+    # Number of GitHub API requests made on behalf of this generation
+    github_requests: int = 0
+
+    @property
+    def ref_query(self) -> str:
+        # Pin reads to the resolved commit so every file comes from the same snapshot
+        return f"?ref={self.head_sha}" if self.head_sha else ""
+
+
+class AsyncGitHubService(GitHubService):
+    """
+    asyncio variant of GitHubService.
+
+    All instances share one pooled keep-alive httpx client, so concurrent
+    route handlers reuse connections to api.github.com instead of opening a
+    new one per call.
+    """
+    _client: httpx.AsyncClient | None = None
+
+    def __init__(self, max_concurrency=None, validator_cache=None):
+        super().__init__()
+        # ETag / Last-Modified validators and bodies of previous responses, keyed by URL.
+        # GitHub does not count 304 responses against the rate limit.
+        self.validator_cache = validator_cache or create_cache(
+            "github-conditional",
+            default_ttl=float(os.getenv("GITHUB_ETAG_CACHE_TTL", str(7 * 24 * 3600))),
+            max_bytes=int(os.getenv("GITHUB_ETAG_CACHE_MAX_BYTES", str(128 * 1024 * 1024))),
+        )
+        # Bound on the number of file fetches in flight for a single repo
+        self.max_concurrency = max_concurrency or int(os.getenv("GITHUB_MAX_CONCURRENCY", "8"))
+        self._token_lock = asyncio.Lock()
+
+    @classmethod
+    def client(cls) -> httpx.AsyncClient:
+        if cls._client is None or cls._client.is_closed:
+            cls._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(30.0, connect=10.0),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                follow_redirects=True,
+            )
+        return cls._client
+
+    @classmethod
+    async def aclose(cls):
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+
+    async def _aget_installation_token(self):
+        async with self._token_lock:
+            if self.access_token and self.token_expires_at > datetime.now():  # type: ignore
+                return self.access_token
+
+            jwt_token = self._generate_jwt()
+            response = await self.client().post(
+                f"https://api.github.com/app/installations/{self.installation_id}/access_tokens",
+                headers={
+                    "Authorization": f"Bearer {jwt_token}",
+                    "Accept": "application/vnd.github+json"
+                }
+            )
+            data = response.json()
+            self.access_token = data["token"]
+            self.token_expires_at = datetime.now() + timedelta(hours=1)
+            return self.access_token
+
+    async def _aget_headers(self):
+        # PAT and anonymous headers need no network round trip
+        if self.github_token or not all([self.client_id, self.private_key, self.installation_id]):
+            return self._get_headers()
+
+        token = await self._aget_installation_token()
+        return {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28"
+        }
+
+    async def _get(self, url, ctx=None, headers=None):
+        """
+        Conditional GET: replays the stored ETag / Last-Modified validators and
+        serves the stored body when GitHub answers 304 Not Modified.
+        """
+        if ctx is not None:
+            ctx.github_requests += 1
+        headers = dict(headers or await self._aget_headers())
+        # The same URL returns different bodies for different media types
+        cache_key = f"{headers.get('Accept', '')} {url}"
+        stored = await self.validator_cache.get(cache_key)
+        if stored:
+            if stored.get("etag"):
+                headers["If-None-Match"] = stored["etag"]
+            if stored.get("last_modified"):
+                headers["If-Modified-Since"] = stored["last_modified"]
+
+        response = await self.client().get(url, headers=headers)
+
+        if response.status_code == 304 and stored:
+            return httpx.Response(
+                200,
+                content=stored["body"].encode("utf-8"),
+                headers={"Content-Type": stored["content_type"], "ETag": stored.get("etag") or ""},
+                request=response.request,
+            )
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status_code == 200 and (etag or last_modified):
+            await self.validator_cache.set(cache_key, {
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_type": response.headers.get("Content-Type", "application/json"),
+                "body": response.text,
+            })
+        return response
+
+    async def resolve_repo(self, username, repo) -> "RepoContext":
+        """
+        Resolves the default branch and its head commit once, so the tree,
+        README and file fetchers of one generation can share them.
+
+        Args:
+            username (str): The GitHub username or organization name
+            repo (str): The repository name
+
+        Returns:
+            RepoContext: Repository metadata; fields stay None when they could not be resolved.
+        """
+        ctx = RepoContext(username, repo)
+        ctx.default_branch = await self.get_default_branch(username, repo, ctx)
+        if ctx.default_branch:
+            ctx.head_sha = await self.get_head_sha(username, repo, ctx.default_branch, ctx)
+        return ctx
+
+    async def get_default_branch(self, username, repo, ctx=None):
+        """Get the default branch of the repository."""
+        response = await self._get(f"https://api.github.com/repos/{username}/{repo}", ctx)
+
+        if response.status_code == 200:
+            return response.json().get('default_branch')
+        return None
+
+    async def get_head_sha(self, username, repo, ref="HEAD", ctx=None):
+        """Get the commit SHA that `ref` (the default branch for HEAD) currently points to."""
+        headers = await self._aget_headers()
+        response = await self._get(
+            f"https://api.github.com/repos/{username}/{repo}/commits/{ref}", ctx,
+            headers={**headers, "Accept": "application/vnd.github.sha"})
+
+        if response.status_code == 200:
+            return response.text.strip()
+        return None
+
+    async def get_github_file_paths_as_list(self, ctx):
+        """
+        Fetches the file tree of an open-source GitHub repository,
+        excluding static files and generated code.
+
+        Args:
+            ctx (RepoContext): The resolved repository
+
+        Returns:
+            str: A filtered and formatted string of file paths in the repository, one per line.
+        """
+        if ctx.tree is not None:
+            return ctx.tree
+
+        # Only guess common branch names when the repository could not be resolved
+        refs = [ctx.head_sha] if ctx.head_sha else ['main', 'master']
+        for ref in refs:
+            response = await self._get(
+                f"https://api.github.com/repos/{ctx.username}/{ctx.repo}/git/trees/{ref}?recursive=1", ctx)
+
+            if response.status_code == 200:
+                data = response.json()
+                if "tree" in data:
+                    paths = [item['path'] for item in data['tree']
+                             if should_include_file(item['path'])]
+                    ctx.tree = "\n".join(paths)
+                    return ctx.tree
+
+        raise ValueError(
+            "Could not fetch repository file tree. Repository might not exist, be empty or private.")
+
+    async def get_github_readme(self, ctx):
+        """
+        Fetches the README contents of an open-source GitHub repository.
+
+        Args:
+            ctx (RepoContext): The resolved repository
+
+        Returns:
+            str: The contents of the README file.
+        """
+        headers = await self._aget_headers()
+        # The raw media type returns the file body directly, saving the download_url round trip
+        response = await self._get(
+            f"https://api.github.com/repos/{ctx.username}/{ctx.repo}/readme{ctx.ref_query}", ctx,
+            headers={**headers, "Accept": "application/vnd.github.raw+json"})
+
+        if response.status_code == 404:
+            raise ValueError("Repository not found.")
+        elif response.status_code != 200:
+            raise Exception(f"Failed to fetch README: {response.status_code}, {response.text}")
+
+        return response.text
+
+    async def get_github_file_content(self, ctx, filepath):
+        """
+        Fetches the contents of a file from an open-source GitHub repository.
+
+        Args:
+            ctx (RepoContext): The resolved repository
+            filepath (str): The path to the file within the repository
+
+        Returns:
+            str: The contents of the specified file.
+        """
+        response = await self._get(
+            f"https://api.github.com/repos/{ctx.username}/{ctx.repo}/contents/{filepath}{ctx.ref_query}", ctx)
+
+        if response.status_code == 404:
+            raise ValueError("File not found in the repository.")
+        elif response.status_code != 200:
+            raise Exception(f"Failed to fetch file: {response.status_code}, {response.text}")
+
+        data = response.json()
+        return b64decode(data['content'].replace("\n", "")).decode('utf-8')
+
+    async def get_github_files_content(self, ctx, filepaths):
+        """
+        Fetches several files concurrently, with at most `max_concurrency` requests in flight.
+
+        Args:
+            ctx (RepoContext): The resolved repository
+            filepaths (list[str]): Paths of the files within the repository
+
+        Returns:
+            dict[str, str]: File contents keyed by path, in the order requested.
+                Files that could not be fetched are left out.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(fpath):
+            async with semaphore:
+                return await self.get_github_file_content(ctx, fpath)
+
+        results = await asyncio.gather(*(fetch(fpath) for fpath in filepaths), return_exceptions=True)
+
+        contents = {}
+        for fpath, result in zip(filepaths, results):
+            if isinstance(result, Exception):
+                print(f"Error fetching {fpath}: {result}")
+                continue
+            contents[fpath] = result
+        return contents
+
+    async def get_repo_archive(self, ctx):
+        """
+        Streams the repository tarball once, building the file listing and
+        keeping the contents of small text files on the way through.
+
+        Args:
+            ctx (RepoContext): The resolved repository; the head commit is fetched
+                when known, otherwise GitHub's default branch
+
+        Returns:
+            RepoArchive: Filtered file paths, extracted file contents and the commit SHA.
+        """
+        url = f"https://api.github.com/repos/{ctx.username}/{ctx.repo}/tarball/{ctx.head_sha or ''}".rstrip("/")
+        reader = TarStreamReader(should_include_file)
+
+        ctx.github_requests += 1
+        async with self.client().stream("GET", url, headers=await self._aget_headers()) as response:
+            if response.status_code == 404:
+                raise ValueError("Repository not found.")
+            elif response.status_code != 200:
+                raise Exception(f"Failed to fetch repository archive: {response.status_code}")
+
+            async for chunk in response.aiter_raw():
+                reader.feed(chunk)
+
+        archive = reader.close()
+        if not archive.paths:
+            raise ValueError(
+                "Could not fetch repository file tree. Repository might not exist, be empty or private.")
+        ctx.tree = archive.file_tree
+        ctx.head_sha = ctx.head_sha or archive.commit_sha
+        return archive
+
+
 def main():
     service = GitHubService()
 
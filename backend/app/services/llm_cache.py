@@ -0,0 +1,38 @@
+import hashlib
+import os
+from app.core.cache import BlockingCache, create_cache
+from app.core.metrics import metrics
+from app.services.llm_content import content_to_text
+
+# LLM calls run in worker threads, so the cache is used through its blocking facade.
+# Shared so replies survive restarts and are reused by every worker
+llm_response_cache = BlockingCache(create_cache(
+    "llm-responses",
+    default_ttl=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+    max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+    shared=True,
+))
+
+
+def response_cache_key(model: str, *parts) -> str:
+    """
+    Content address of an LLM request: a hash of the model and every prompt part.
+
+    Parts are length-prefixed so different splits of the same text never collide.
+    """
+    digest = hashlib.sha256()
+    for part in (model, *parts):
+        data = content_to_text(part).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def get_cached_response(operation: str, key: str):
+    """Looks up a response and tags the request as a cache hit or miss."""
+    response = llm_response_cache.get(key)
+    counter = "hits" if response is not None else "misses"
+    metrics.increment(f"llm_response_cache_{counter}")
+    metrics.increment(f"llm_{operation}_cache_{counter}")
+    print(f"LLM response cache {'hit' if response is not None else 'miss'} for {operation}")
+    return response
@@ -0,0 +1,18 @@
+def content_to_text(content) -> str:
+    """
+    Returns prompt content as text without touching the disk.
+
+    Args:
+        content (str | bytes | bytearray | memoryview | file-like): In-memory
+            content, or an open text or binary stream to read it from
+
+    Returns:
+        str: The content decoded as UTF-8 where needed
+    """
+    if isinstance(content, str):
+        return content
+    if hasattr(content, "read"):
+        content = content.read()
+        if isinstance(content, str):
+            return content
+    return bytes(content).decode("utf-8", errors="replace")
@@ -0,0 +1,276 @@
+import concurrent.futures
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from xml.sax.saxutils import escape
+from app.core.metrics import metrics
+from app.services.llm_content import content_to_text
+from app.services.ssml import build_ssml
+
+try:
+    from app.services.gemini_service import GeminiService
+except ImportError:  # google-generativeai is only needed for the Gemini provider
+    GeminiService = None
+
+
+class LLMProvider:
+    """Generates a podcast script from a system prompt and the repository content."""
+    name = "base"
+    model = "base"
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def complete(self, system_prompt: str, content, instructions: str = "") -> str:
+        """
+        Args:
+            system_prompt (str): Static prompt, sent first so providers can cache it
+            content: Repository content (str, bytes or file-like), sent next
+            instructions (str): Request specific instructions, sent last
+        """
+        raise NotImplementedError
+
+    def stream(self, system_prompt: str, content, instructions: str = ""):
+        """Yields the reply in pieces; providers without streaming yield it whole."""
+        yield self.complete(system_prompt, content, instructions)
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+    model = "gpt-4o"
+
+    def __init__(self):
+        self._service = None
+
+    @property
+    def available(self) -> bool:
+        return bool(os.environ.get("OPENAI_API_KEY"))
+
+    @property
+    def service(self):
+        if self._service is None:
+            from app.services.openai_service import OpenAIService
+            self._service = OpenAIService()
+        return self._service
+
+    def complete(self, system_prompt: str, content, instructions: str = "") -> str:
+        return self.service.call_openai_for_response(content, system_prompt, instructions)
+
+    def stream(self, system_prompt: str, content, instructions: str = ""):
+        return self.service.stream_openai_response(content, system_prompt, instructions)
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+    model = "gemini-2.0-flash-exp"
+
+    def __init__(self):
+        self._service = None
+
+    @property
+    def available(self) -> bool:
+        return GeminiService is not None and bool(os.environ.get("GEMINI_API_KEY"))
+
+    def complete(self, system_prompt: str, content, instructions: str = "") -> str:
+        if self._service is None:
+            self._service = GeminiService()
+        return self._service.call_gemini_flash_for_ssml(content, system_prompt, instructions)
+
+
+class LocalLLMProvider(LLMProvider):
+    """
+    Offline stand-in that reads the first lines of the content aloud as a two-voice script.
+
+    It needs no credentials, which makes the whole pipeline runnable in
+    development and tests. It is only used when listed in LLM_PROVIDERS.
+    """
+    name = "local"
+    model = "local"
+
+    VOICES = ("en-US-AvaMultilingualNeural", "en-US-DustinMultilingualNeural")
+    MAX_LINES = 40
+    MAX_LINE_CHARS = 300
+
+    def complete(self, system_prompt: str, content, instructions: str = "") -> str:
+        lines = [line.strip()[:self.MAX_LINE_CHARS] for line in content_to_text(content).splitlines() if line.strip()]
+        return build_ssml([
+            f'<voice name="{voice}">\n{escape(line)}\n</voice>'
+            for voice, line in zip(itertools.cycle(self.VOICES), lines[:self.MAX_LINES])
+        ])
+
+
+class LLMRouter:
+    """
+    Sends script generation to the fastest healthy provider.
+
+    Providers are ranked by their recent p50 latency; one whose error rate
+    over the last `window` calls reaches `max_error_rate` moves to the back.
+    Providers without measurements follow the measured ones in their
+    configured order, so a fallback is only tried once the preferred
+    providers fail. A failed call falls through to the next provider.
+
+    With hedging enabled, a duplicate request goes to the next provider once
+    the primary runs past its own p95 latency (or `hedge_after` seconds before
+    there is any), and the first successful reply wins. The slower request
+    cannot be cancelled and finishes in the background.
+
+    Args:
+        providers (list[LLMProvider]): Candidates in order of preference
+        hedge (bool): Whether to send hedged duplicate requests
+        hedge_after (float): Hedge delay used until the primary has latency samples
+        max_error_rate (float): Error rate at which a provider counts as unhealthy
+        window (int): Number of recent calls the error rate is computed over
+    """
+
+    def __init__(self, providers: list[LLMProvider], hedge: bool = False, hedge_after: float = 60.0,
+                 max_error_rate: float = 0.5, window: int = 20):
+        self.providers = providers
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self.max_error_rate = max_error_rate
+        self._lock = threading.Lock()
+        self._outcomes = {provider.name: deque(maxlen=window) for provider in providers}
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=4 * max(len(providers), 1))
+
+    @property
+    def model_identity(self) -> str:
+        """Names every configured provider and model, for keying cached replies."""
+        return ",".join(f"{provider.name}/{provider.model}" for provider in self.providers)
+
+    def error_rate(self, provider: LLMProvider) -> float:
+        with self._lock:
+            outcomes = list(self._outcomes[provider.name])
+        return outcomes.count(False) / len(outcomes) if outcomes else 0.0
+
+    def ranked(self) -> list[LLMProvider]:
+        """Available providers, healthiest and fastest first."""
+        candidates = [provider for provider in self.providers if provider.available]
+
+        def rank(item):
+            index, provider = item
+            p50 = metrics.percentile(f"llm_{provider.name}_latency_seconds", 50)
+            return self.error_rate(provider) >= self.max_error_rate, p50 is None, p50 or 0.0, index
+
+        return [provider for _, provider in sorted(enumerate(candidates), key=rank)]
+
+    def complete(self, system_prompt: str, content, instructions: str = "") -> str:
+        """
+        Returns the reply of the first provider that succeeds.
+
+        Raises:
+            RuntimeError: When no provider is available
+            Exception: The last provider error when every provider failed
+        """
+        providers = self._require_providers()
+        if self.hedge and len(providers) > 1:
+            return self._complete_hedged(providers, system_prompt, content, instructions)
+
+        for provider in providers:
+            try:
+                return self._call(provider, provider.complete, system_prompt, content, instructions)
+            except Exception as e:
+                error = e
+                print(f"LLM provider {provider.name} failed: {e}")
+        raise error
+
+    def stream(self, system_prompt: str, content, instructions: str = ""):
+        """
+        Streams the reply of the best provider.
+
+        Streams are not hedged. A provider that fails before yielding
+        anything is replaced by the next one; a failure mid-stream is raised.
+        """
+        providers = self._require_providers()
+        for index, provider in enumerate(providers):
+            start, started = time.perf_counter(), False
+            try:
+                for piece in provider.stream(system_prompt, content, instructions):
+                    started = True
+                    yield piece
+            except Exception as e:
+                self._record(provider, time.perf_counter() - start, ok=False)
+                print(f"LLM provider {provider.name} failed while streaming: {e}")
+                if started or index == len(providers) - 1:
+                    raise
+                continue
+            self._record(provider, time.perf_counter() - start, ok=True)
+            return
+
+    def _complete_hedged(self, providers, system_prompt, content, instructions) -> str:
+        primary, remaining = providers[0], list(providers[1:])
+        futures = {self._executor.submit(self._call, primary, primary.complete, system_prompt, content, instructions)}
+        hedge_delay = metrics.percentile(f"llm_{primary.name}_latency_seconds", 95) or self.hedge_after
+
+        done, _ = concurrent.futures.wait(futures, timeout=hedge_delay)
+        error = None
+        while True:
+            for future in done:
+                futures.discard(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    error = e
+            if remaining and (not done or not futures):
+                # The primary is slow or every request so far failed: ask the next provider too
+                backup = remaining.pop(0)
+                if not done:
+                    metrics.increment("llm_hedged_requests")
+                futures.add(self._executor.submit(
+                    self._call, backup, backup.complete, system_prompt, content, instructions))
+            if not futures:
+                raise error
+            done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+
+    def _call(self, provider: LLMProvider, fn, *args):
+        start = time.perf_counter()
+        try:
+            result = fn(*args)
+        except Exception:
+            self._record(provider, time.perf_counter() - start, ok=False)
+            raise
+        self._record(provider, time.perf_counter() - start, ok=True)
+        return result
+
+    def _record(self, provider: LLMProvider, elapsed: float, ok: bool):
+        with self._lock:
+            self._outcomes[provider.name].append(ok)
+        if ok:
+            metrics.observe(f"llm_{provider.name}_latency_seconds", elapsed)
+        else:
+            metrics.increment(f"llm_{provider.name}_errors")
+
+    def _require_providers(self) -> list[LLMProvider]:
+        providers = self.ranked()
+        if not providers:
+            raise RuntimeError("No LLM provider is available. Please set OPENAI_API_KEY or GEMINI_API_KEY in .env")
+        return providers
+
+
+LLM_PROVIDERS = {
+    provider.name: provider
+    for provider in (OpenAIProvider, GeminiProvider, LocalLLMProvider)
+}
+
+
+def create_llm_router(names: str | None = None) -> LLMRouter:
+    """
+    Builds the router over the providers named by `names` or the LLM_PROVIDERS environment variable.
+
+    Args:
+        names (str | None): Comma separated provider names in order of
+            preference, "openai,gemini" by default; add "local" for the offline stand-in
+    """
+    names = names or os.environ.get("LLM_PROVIDERS", "openai,gemini")
+    providers = []
+    for name in (name.strip() for name in names.split(",") if name.strip()):
+        if name not in LLM_PROVIDERS:
+            raise ValueError(f"Unknown LLM provider: {name}")
+        providers.append(LLM_PROVIDERS[name]())
+    return LLMRouter(
+        providers,
+        hedge=os.environ.get("LLM_HEDGE", "false").lower() == "true",
+        hedge_after=float(os.environ.get("LLM_HEDGE_AFTER_SECONDS", "60")),
+    )
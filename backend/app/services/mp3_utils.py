@@ -0,0 +1,92 @@
+# Bitrates in kbit/s indexed by [version is MPEG-1][layer][bitrate index]
+BITRATES = {
+    True: {
+        1: [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+        2: [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+        3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    },
+    False: {
+        1: [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+        2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+        3: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    },
+}
+
+# Sample rates indexed by the two version bits: 0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1
+SAMPLE_RATES = {
+    0: [11025, 12000, 8000],
+    2: [22050, 24000, 16000],
+    3: [44100, 48000, 32000],
+}
+
+
+def parse_frame_header(data, offset: int) -> tuple[int, int, int] | None:
+    """
+    Parses the MPEG audio frame header at `offset`.
+
+    Returns:
+        tuple[int, int, int] | None: (frame length in bytes, samples in the frame,
+            sample rate), None when there is no valid header at `offset`
+    """
+    if offset + 4 > len(data) or data[offset] != 0xFF or data[offset + 1] & 0xE0 != 0xE0:
+        return None
+
+    version_bits = (data[offset + 1] >> 3) & 0x03
+    layer = 4 - ((data[offset + 1] >> 1) & 0x03)
+    bitrate_index = data[offset + 2] >> 4
+    sample_rate_index = (data[offset + 2] >> 2) & 0x03
+    padding = (data[offset + 2] >> 1) & 0x01
+    if version_bits == 1 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    mpeg1 = version_bits == 3
+    bitrate = BITRATES[mpeg1][layer][bitrate_index] * 1000
+    sample_rate = SAMPLE_RATES[version_bits][sample_rate_index]
+
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4, 384, sample_rate
+    samples = 576 if layer == 3 and not mpeg1 else 1152
+    return samples // 8 * bitrate // sample_rate + padding, samples, sample_rate
+
+
+def _is_info_frame(data, offset: int) -> bool:
+    # Xing/Info/VBRI metadata frames sit right after the side information and carry no audio
+    mpeg1 = (data[offset + 1] >> 3) & 0x03 == 3
+    mono = data[offset + 3] >> 6 == 3
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    tag = bytes(data[offset + 4 + side_info:offset + 8 + side_info])
+    return tag in (b"Xing", b"Info") or bytes(data[offset + 36:offset + 40]) == b"VBRI"
+
+
+def mp3_duration_seconds(data: bytes) -> float:
+    """
+    Computes the playing time of an MP3 from its frame headers, without decoding audio.
+
+    Every frame is visited (a header read and a jump per frame), so files
+    stitched from several segments are measured correctly; Xing/Info
+    metadata frames and ID3 tags are skipped.
+
+    Args:
+        data (bytes): MP3 file contents
+
+    Returns:
+        float: Duration in seconds
+    """
+    data = memoryview(data)
+    offset = 0
+    if bytes(data[:3]) == b"ID3" and len(data) >= 10:
+        offset = 10 + ((data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9])
+
+    duration = 0.0
+    while offset + 4 <= len(data):
+        header = parse_frame_header(data, offset)
+        if header is None:
+            # Lost sync (ID3 tag, junk between segments): scan for the next frame
+            offset += 1
+            continue
+
+        frame_length, samples, sample_rate = header
+        if not _is_info_frame(data, offset):
+            duration += samples / sample_rate
+        offset += frame_length
+    return duration
@@ -3,64 +3,123 @@ import openai
 from dotenv import load_dotenv
 from pydantic import BaseModel
 from typing import List
+from app.services.llm_content import content_to_text
+from app.services.llm_cache import llm_response_cache, response_cache_key, get_cached_response
+from app.core.metrics import metrics
 load_dotenv()
+IMPORTANT_FILES_PROMPT = "Can you give the list of upto 10 most important file paths in this file tree to understand code architechture and high level decisions and overall what the repository is about to include in the podcast i am creating, as a list, do not write any unknown file paths not listed below"
+
+
 class FileListFormat(BaseModel):
     file_list: List[str]
 
+def build_messages(system_prompt: str, content, instructions: str = "") -> list[dict]:
+    """
+    Orders a request for provider-side prompt caching.
+
+    Providers cache the longest previously seen prefix, so the static system
+    prompt goes first, then the repository content (identical across retries,
+    both audio lengths and the first half of long podcasts), and the
+    part-specific instructions last.
+    """
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": content_to_text(content)},
+    ]
+    if instructions:
+        messages.append({"role": "system", "content": instructions})
+    return messages
+
+
+def record_prompt_cache_usage(usage):
+    """Records how many prompt tokens of one request were served from the provider's prompt cache."""
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", None) or 0
+    metrics.increment("llm_prompt_tokens", usage.prompt_tokens)
+    metrics.increment("llm_cached_prompt_tokens", cached_tokens)
+    metrics.observe("llm_cached_prompt_tokens_per_request", cached_tokens)
+    print(f"Prompt tokens: {usage.prompt_tokens}, cached: {cached_tokens}")
+
+
 class OpenAIService:
     def __init__(self):
-        # Retrieve necessary Azure OpenAI API setup from environment variables
-        openai.api_type = "openai"  # azure / openai
-        openai.api_version = "2024-10-21"
-        openai.api_key = os.environ["OPENAI_API_KEY"]  # use openai key for openai api
+        # A client instance instead of module-level openai settings, so services don't share state
+        self.client = openai.OpenAI(api_key=os.environ["OPENAI_API_KEY"])
         # Model name should match your Azure configuration
         self.model_name = "gpt-4o"
 
-    def call_openai_for_response(self, files_path, ssml_prompt_text):
+    def call_openai_for_response(self, content, ssml_prompt_text, instructions=""):
         """
         Calls Azure OpenAI API to generate a response based on the given text prompt.
 
         Args:
-            prompt_text (str): The input text prompt for the model.
+            content (str | bytes | file-like): Everything the prompt is about (readme + tree + other files)
+            ssml_prompt_text (str): The static system prompt for the model.
+            instructions (str): Request specific instructions, sent after the content.
 
         Returns:
             str: The generated response from the model.
         """
-        # Read the content of the file specified by files_path
-        with open(files_path[0], 'r') as file:
-            file_content = file.read()  # this has everything readme + tree + other files
         # Send the prompt to Azure OpenAI for processing
-        response = openai.chat.completions.create(
+        response = self.client.chat.completions.create(
             model=self.model_name,
-            messages=[
-                {"role": "system", "content": ssml_prompt_text},  # Initial system prompt
-                {"role": "user", "content": file_content}  # User prompt
-            ]
+            messages=build_messages(ssml_prompt_text, content, instructions),
         )
-        # print(response)
+        record_prompt_cache_usage(response.usage)
         # Get and return the content of the assistant's reply
         assistant_response = response.choices[0].message.content.strip()
         return assistant_response
 
+    def stream_openai_response(self, content, ssml_prompt_text, instructions=""):
+        """
+        Streaming variant of `call_openai_for_response`.
+
+        Yields:
+            str: Pieces of the assistant's reply as the model writes them
+        """
+        stream = self.client.chat.completions.create(
+            model=self.model_name,
+            messages=build_messages(ssml_prompt_text, content, instructions),
+            stream=True,
+            # Usage, including cached tokens, arrives in a final chunk without choices
+            stream_options={"include_usage": True},
+        )
+        for chunk in stream:
+            if chunk.usage is not None:
+                record_prompt_cache_usage(chunk.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
     def get_important_files(self, file_tree):
         # file_tree = "api/backend/main.py  api.py"
+        cache_key = response_cache_key(self.model_name, IMPORTANT_FILES_PROMPT, file_tree)
+        cached_file_list = get_cached_response("important_files", cache_key)
+        if cached_file_list is not None:
+            return cached_file_list
+
         # Send the prompt to Azure OpenAI for processing
-        response = openai.beta.chat.completions.parse(
+        response = self.client.beta.chat.completions.parse(
             model=self.model_name,
             messages=[
-                {"role": "system", "content": "Can you give the list of upto 10 most important file paths in this file tree to understand code architechture and high level decisions and overall what the repository is about to include in the podcast i am creating, as a list, do not write any unknown file paths not listed below"},  # Initial system prompt
+                {"role": "system", "content": IMPORTANT_FILES_PROMPT},  # Initial system prompt
                 {"role": "user", "content": file_tree}
             ],
             response_format=FileListFormat,
         )
+        record_prompt_cache_usage(response.usage)
         try:
             response = response.choices[0].message.parsed
             print(type(response), " resp ")
-            return response.file_list
         except Exception as e:
             print("Error processing file tree:", e)
             return []
 
+        if response.file_list:
+            llm_response_cache.set(cache_key, response.file_list)
+        return response.file_list
+
 
 # Example usage
 if __name__ == "__main__":
@@ -68,6 +127,6 @@ if __name__ == "__main__":
     openai_service = OpenAIService()
     r = openai_service.get_important_files("")
     print(r)
-    # file_paths = ["/Users/manish/Downloads/ahmedkhaleel2004-gitdiagram.txt"]
-    # response = azure_openai_service.call_openai_for_response(file_paths, ssml_prompt)
+    # with open("/Users/manish/Downloads/ahmedkhaleel2004-gitdiagram.txt") as f:
+    #     response = openai_service.call_openai_for_response(f.read(), ssml_prompt)
     # print("AI Response:", response)
\ No newline at end of file
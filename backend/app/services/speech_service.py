@@ -1,34 +1,91 @@
 from dotenv import load_dotenv
-import azure.cognitiveservices.speech as speechsdk
-from app.services.openai_service import OpenAIService
+from app.services.llm_router import create_llm_router
+from app.services.tts_backends import create_tts_backend, SynthesisResult
+from app.services.webvtt import WordBoundary, seconds_to_timestamp, add_line_breaks
+from app.services.mp3_utils import mp3_duration_seconds
+from app.services.ssml import DEFAULT_SPEAK_TAG, SSMLNormalizer, build_ssml, iter_voice_blocks, normalize_ssml, repair_ssml
+from app.services.llm_content import content_to_text
+from app.services.llm_cache import llm_response_cache, response_cache_key, get_cached_response
+from app.core.metrics import metrics
 import os
 import re
-import textwrap
 import xml.etree.ElementTree as ET
-import time
-import requests
-import uuid
-import zipfile
-from io import BytesIO
+import concurrent.futures
+import queue
+import threading
 
 load_dotenv()
 
-openai_service = OpenAIService()
+llm_router = create_llm_router()
+
+VOICE_BLOCK_PATTERN = re.compile(r'<voice\b[^>]*>.*?</voice>', re.DOTALL)
+
+
+def split_ssml_by_voice(ssml_string: str, max_chunk_chars: int = 6000, first_chunk_chars: int | None = None) -> list[str]:
+    """
+    Splits an SSML document at <voice> boundaries into standalone SSML documents.
+
+    Consecutive voice blocks are grouped until a chunk would exceed
+    `max_chunk_chars`; a single oversized block still gets its own chunk.
+
+    Args:
+        ssml_string (str): Complete SSML document
+        max_chunk_chars (int): Soft size limit of each chunk
+        first_chunk_chars (int | None): Smaller limit for the first chunk, so
+            streamed playback can start sooner
+
+    Returns:
+        list[str]: Chunks in document order, each wrapped in the original <speak> tag
+    """
+    speak_match = re.search(r'<speak[^>]*>', ssml_string)
+    speak_tag = speak_match.group(0) if speak_match else DEFAULT_SPEAK_TAG
+    blocks = VOICE_BLOCK_PATTERN.findall(ssml_string)
+    if not blocks:
+        return [ssml_string]
+
+    return [f"{speak_tag}{''.join(chunk)}</speak>"
+            for chunk in group_voice_blocks(blocks, max_chunk_chars, first_chunk_chars)]
 
-class MemoryStreamCallback(speechsdk.audio.PushAudioOutputStreamCallback):
-    def __init__(self):
-        super().__init__()
-        self._audio_data = bytes()
 
-    def write(self, audio_buffer: memoryview) -> int:
-        self._audio_data += bytes(audio_buffer)
-        return audio_buffer.nbytes
+def group_voice_blocks(blocks, max_chunk_chars: int = 6000, first_chunk_chars: int | None = None):
+    """
+    Groups consecutive voice blocks into chunks for synthesis, see `split_ssml_by_voice`.
 
-    def close(self):
-        pass
+    `blocks` may be a lazy iterator; each group is yielded as soon as the
+    next block no longer fits into it.
+    """
+    current, current_len, groups = [], 0, 0
+    for block in blocks:
+        limit = first_chunk_chars if first_chunk_chars and not groups else max_chunk_chars
+        if current and current_len + len(block) > limit:
+            yield current
+            groups += 1
+            current, current_len = [], 0
+        current.append(block)
+        current_len += len(block)
+    if current:
+        yield current
 
-    def get_audio_data(self) -> bytes:
-        return self._audio_data
+
+def strip_mp3_tags(segment: bytes) -> memoryview:
+    """Returns the audio frames of an MP3 segment without its ID3v2 / ID3v1 tags."""
+    start, end = 0, len(segment)
+    if segment[:3] == b"ID3" and len(segment) >= 10:
+        # ID3v2 size is a 28-bit synchsafe integer, excluding the 10 byte header
+        size = (segment[6] << 21) | (segment[7] << 14) | (segment[8] << 7) | segment[9]
+        start = 10 + size
+    if end - start >= 128 and segment[end - 128:end - 125] == b"TAG":
+        end -= 128
+    return memoryview(segment)[start:end]
+
+
+def concatenate_mp3(segments: list[bytes]) -> bytes:
+    """
+    Joins MP3 segments of identical format by concatenating their frames.
+
+    ID3 tags are stripped from every segment so only audio frames remain.
+    """
+    return b"".join(strip_mp3_tags(segment) for segment in segments)
 
 
 class SpeechService:
@@ -36,92 +93,111 @@ class SpeechService:
         # Load environment variables
         self.speech_key = os.environ.get("SPEECH_KEY")
         self.speech_region = os.environ.get("SPEECH_REGION")
+        self.backend = create_tts_backend()
+        # Chunked synthesis settings
+        self.max_parallel_synthesis = int(os.environ.get("TTS_MAX_PARALLEL", "4"))
+        self.max_chunk_chars = int(os.environ.get("TTS_CHUNK_CHARS", "6000"))
+        self.first_chunk_chars = int(os.environ.get("TTS_FIRST_CHUNK_CHARS", "800"))
 
-    def text_to_mp3(self, ssml_string: str) -> bytes | None:
+    def synthesize_chunked(self, ssml_string: str) -> SynthesisResult | None:
         """
-        Converts a string to an mp3 bytes object using Azure Text to Speech Batch Synthesis API.
+        Synthesizes the SSML in voice-aligned chunks concurrently and stitches the results in order.
+
+        Wall-clock time approaches that of the slowest chunk instead of the whole script.
+        Word boundaries of later chunks are shifted by the duration of the audio before them.
 
         Args:
-            ssml_string (str): Text to be converted to speech
+            ssml_string (str): Complete SSML document
 
         Returns:
-            bytes | None: Returns mp3 bytes object, None if error
+            SynthesisResult | None: Stitched mp3 and word boundaries, None if any chunk failed
         """
+        chunks = split_ssml_by_voice(ssml_string, self.max_chunk_chars)
+        if len(chunks) == 1:
+            return self.synthesize(chunks[0])
 
-        MAX_RETRIES = 3
-        RETRY_DELAY = 2
+        max_workers = min(len(chunks), self.max_parallel_synthesis)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(self.synthesize, chunks))
 
-        if not self.speech_key or not self.speech_region:
+        if any(result is None for result in results):
             return None
 
-        synthesis_id = str(uuid.uuid4())
-        put_url = f"https://{self.speech_region}.api.cognitive.microsoft.com/texttospeech/batchsyntheses/{synthesis_id}?api-version=2024-04-01"
-
-        headers = {
-            "Ocp-Apim-Subscription-Key": self.speech_key,
-            "Content-Type": "application/json"
-        }
-
-        body = {
-            "description": "my ssml test",
-            "inputKind": "SSML",
-            "inputs": [
-                {"content": ssml_string}
-            ],
-            "properties": {
-                "outputFormat": "audio-16khz-32kbitrate-mono-mp3",
-                "wordBoundaryEnabled": False,
-                "sentenceBoundaryEnabled": False,
-                "concatenateResult": False,
-                "decompressOutputFiles": False
-            }
-        }
-
-        for attempt in range(MAX_RETRIES):
-            try:
-                put_response = requests.put(put_url, headers=headers, json=body)
-                put_response.raise_for_status()
-
-                # Polling operation status
-                status_url = f"https://{self.speech_region}.api.cognitive.microsoft.com/texttospeech/batchsyntheses/{synthesis_id}?api-version=2024-04-01"
-                while True:
-                    time.sleep(RETRY_DELAY)
-                    status_response = requests.get(status_url, headers=headers)
-                    status_response.raise_for_status()
-                    status = status_response.json()
-                    operation_status = status.get("status")
-
-                    if operation_status == "Succeeded":
-                        download_url = status["outputs"]["result"]
-                        zip_response = requests.get(download_url)
-                        zip_response.raise_for_status()
-
-                        # Extract .wav file from zip
-                        with zipfile.ZipFile(BytesIO(zip_response.content)) as zip_file:
-                            for file_name in zip_file.namelist():
-                                if file_name.endswith(".wav") or file_name.endswith(".mp3"):
-                                    with zip_file.open(file_name) as audio_file:
-                                        audio_content = audio_file.read()
-
-                                        # # Save the file locally
-                                        # with open(file_name, 'wb') as local_file:
-                                        #     local_file.write(audio_content)
-
-                                        return audio_content
-                    elif operation_status == "Failed":
-                        raise Exception("Batch synthesis failed")
-                    elif operation_status in ["Running", "NotStarted"]:
-                        continue
-                    else:
-                        raise Exception(f"Unexpected operation status: {operation_status}")
+        word_boundaries, elapsed = [], 0.0
+        for result in results:
+            word_boundaries.extend(
+                WordBoundary(word.text, word.offset + elapsed, word.duration) for word in result.word_boundaries)
+            elapsed += mp3_duration_seconds(result.audio)
+        return SynthesisResult(concatenate_mp3([result.audio for result in results]), word_boundaries)
+
+    def iter_mp3_from_voice_blocks(self, voice_blocks):
+        """
+        Yields MP3 audio progressively for voice blocks that are still being written.
+
+        Blocks are grouped into chunks as they arrive and each chunk starts
+        synthesizing right away, so speech begins while the model is still
+        producing the rest of the script. Chunks synthesize concurrently, but
+        each one is yielded as soon as it and every chunk before it are done,
+        so playback can start after the (deliberately small) first chunk.
+
+        Args:
+            voice_blocks (Iterable[str]): <voice> elements in document order
+
+        Yields:
+            bytes: MP3 frames of consecutive chunks, in document order
+        """
+        chunks = (f"{DEFAULT_SPEAK_TAG}{''.join(group)}</speak>"
+                  for group in group_voice_blocks(voice_blocks, self.max_chunk_chars, self.first_chunk_chars))
+        return self.iter_mp3_from_chunks(chunks)
 
+    def iter_mp3_from_chunks(self, chunks):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_parallel_synthesis)
+        pending = queue.Queue()
+        stopped = threading.Event()
+
+        def submit_chunks():
+            # Pulls chunks on its own thread so a slow source never holds back finished audio
+            try:
+                for chunk in chunks:
+                    if stopped.is_set():
+                        return
+                    pending.put(executor.submit(self.text_to_mp3, chunk))
             except Exception as e:
-                print(f"Exception occurred: {str(e)}")
-                if attempt < MAX_RETRIES - 1:
-                    print(f"Retrying... (attempt {attempt + 1}/{MAX_RETRIES})")
-                    time.sleep(RETRY_DELAY)
-                else:
-                    return None
+                print(f"Producing speech chunks failed: {e}")
+            finally:
+                pending.put(None)
+
+        threading.Thread(target=submit_chunks, daemon=True).start()
+        try:
+            index = 0
+            while (future := pending.get()) is not None:
+                index += 1
+                segment = future.result()
+                if segment is None:
+                    print(f"Synthesis failed for chunk {index}, ending stream")
+                    return
+                yield bytes(strip_mp3_tags(segment))
+        finally:
+            # Stop queued chunks when the listener goes away early
+            stopped.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def synthesize(self, ssml_string: str) -> SynthesisResult | None:
+        """Synthesizes one SSML document with the configured TTS backend."""
+        return self.backend.synthesize(ssml_string)
+
+    def text_to_mp3(self, ssml_string: str) -> bytes | None:
+        """
+        Converts an SSML string to an mp3 bytes object using the configured TTS backend.
+
+        Args:
+            ssml_string (str): Text to be converted to speech
+
+        Returns:
+            bytes | None: Returns mp3 bytes object, None if error
+        """
+        result = self.synthesize(ssml_string)
+        return result.audio if result else None
 
     def calculate_duration(self, text_line, wpm=135):
         words = len(text_line.split())
@@ -138,21 +214,12 @@ class SpeechService:
             return 0
 
     def ssml_to_webvtt(self, ssml_content, duration_in_seconds, max_line_length=45, max_words_per_cue=30):
-        # Helper function to insert line breaks at appropriate places
-        def add_line_breaks(text, max_length):
-            words = text.split()
-            lines, current_line = [], ""
-            for word in words:
-                # Check if adding the next word exceeds the length limit
-                if len(current_line) + len(word) + 1 > max_length:
-                    lines.append(current_line)
-                    current_line = word
-                else:
-                    current_line += (" " if current_line else "") + word
-            if current_line:  # Add the remainder of the text if any
-                lines.append(current_line)
-            return "\n".join(lines)
+        """
+        Estimates captions by spreading the average speaking rate over the text.
 
+        Only used when the TTS backend reported no word boundaries; see
+        webvtt.boundaries_to_webvtt for exact timing.
+        """
         # Step 1: Extract text from SSML, remove specific tags, and empty lines
         text_content = re.sub(r'<speak[^>]*>|</speak>|<break[^>]*>', '', ssml_content)
         text_content = re.sub(r'<voice[^>]*>', '\n\n', text_content)
@@ -161,57 +228,27 @@ class SpeechService:
         text_lines = list(filter(None, [line.strip() for line in text_content.splitlines()]))
 
         # Step 2: Generate WebVTT content with sequential timestamps
-        vtt_content = textwrap.dedent("""\
-            WEBVTT
-
-            """)
+        vtt_parts = ["WEBVTT\n\n"]
         cumulative_time = 0.0
         cue_index = 0
         wpm = int(self.no_of_words(text_lines) / duration_in_seconds * 60)
         print(wpm, " Words per minute")
-        for i, line in enumerate(text_lines):
-
+        for line in text_lines:
             # Break the line if it's too long into sub-lines based on word count
             words = line.split()
-            sub_lines = []
             for j in range(0, len(words), max_words_per_cue):
                 sub_line = ' '.join(words[j:j + max_words_per_cue])
-                sub_lines.append(sub_line)
-
-            # Generate VTT for each sub-line
-            for sub_line in sub_lines:
-                duration = self.calculate_duration(sub_line, wpm=wpm)
                 start_time = cumulative_time
-                end_time = start_time + duration
+                end_time = start_time + self.calculate_duration(sub_line, wpm=wpm)
                 cumulative_time = end_time  # Update cumulative time for next line
 
-                # Convert seconds to VTT timestamp format (HH:MM:SS.mmm)
-                def seconds_to_timestamp(seconds):
-                    hours = int(seconds // 3600)
-                    minutes = int((seconds % 3600) // 60)
-                    seconds = seconds % 60
-                    return f"{hours:02}:{minutes:02}:{seconds:06.3f}"
-
-                formatted_sub_line = add_line_breaks(sub_line, max_line_length)
                 cue_index += 1
-                vtt_content += f"{cue_index}\n"
-                vtt_content += f"{seconds_to_timestamp(start_time)} --> {seconds_to_timestamp(end_time)} line:5% align:center\n"
-                vtt_content += f"{formatted_sub_line}\n\n"
-
-        return vtt_content
-
-        # Function to remove the first occurrence of the <speak> tag using regex
-    def remove_first_speak_tag(self, content):
-        # Regex pattern to match the <speak> tag with version and xmlns attributes
-        speak_pattern = r'<speak[^>]*>'
-
-        # Replace the first occurrence of the <speak> tag
-        content_no_speak = re.sub(speak_pattern, '', content, count=1)
+                vtt_parts.append(
+                    f"{cue_index}\n"
+                    f"{seconds_to_timestamp(start_time)} --> {seconds_to_timestamp(end_time)} line:5% align:center\n"
+                    f"{add_line_breaks(sub_line, max_line_length)}\n\n")
 
-        # Similarly, remove the first occurrence of the closing </speak> tag
-        content_no_speak = re.sub(r'</speak>', '', content_no_speak, count=1)
-
-        return content_no_speak
+        return "".join(vtt_parts)
 
     # Function to validate SSML
     def is_valid_ssml(self, ssml: str) -> bool:
@@ -222,48 +259,128 @@ class SpeechService:
         except ET.ParseError:
             return False
 
-    # Function to sanitize SSML by removing invalid break and code tags
-    def sanitize_ssml(self, ssml: str) -> str:
-        try:
-            # Parse the input SSML
-            root = ET.fromstring(ssml)
+    def stream_ssml_voice_blocks(self, content, prompt, instructions=""):
+        """
+        Yields the <voice> blocks of a podcast script while the model is still writing it.
 
-            # The namespace URI if any (extracted from the root tag)
-            default_ns_uri = root.tag.split('}')[0].strip('{')
+        A script generated before for the same providers, prompt and content
+        is replayed from the LLM response cache instead. A freshly streamed
+        script is cached once it completed without losing any blocks.
 
-            # Remove non-<voice> children while preserving the element itself
-            for child in list(root):
-                # Extract the local name by splitting the namespace
-                tag_name = child.tag
-                tag_without_ns = tag_name.split('}')[1] if '}' in tag_name else tag_name
+        Yields:
+            str: Serialized <voice> elements in document order
+        """
+        content = content_to_text(content)
+        cache_key = response_cache_key(llm_router.model_identity, prompt, instructions, content)
+        cached_ssml = get_cached_response("ssml", cache_key)
+        if cached_ssml is not None:
+            yield from iter_voice_blocks(cached_ssml)
+            return
+
+        blocks = []
+        stream = self._stream_ssml_voice_blocks(content, prompt, instructions)
+        while True:
+            try:
+                block = next(stream)
+            except StopIteration as stop:
+                complete = stop.value
+                break
+            blocks.append(block)
+            yield block
+        if complete and blocks:
+            llm_response_cache.set(cache_key, build_ssml(blocks))
+
+    def _stream_ssml_voice_blocks(self, content, prompt, instructions=""):
+        """
+        Streams the script from the LLM; returns whether every block was yielded.
 
-                if tag_without_ns != 'voice':
-                    root.remove(child)
+        If the streamed XML turns out to be malformed, the rest of the
+        response is collected, repaired locally and only the blocks not yet
+        yielded are emitted. The model is asked again only when repair fails
+        before anything was emitted.
+        """
+        normalizer, response_parts, emitted = SSMLNormalizer(), [], 0
+        for delta in llm_router.stream(prompt, content, instructions):
+            response_parts.append(delta)
+            if normalizer is None:
+                continue
+            try:
+                blocks = normalizer.feed(delta)
+            except ET.ParseError as e:
+                print(f"Invalid SSML while streaming ({e}), repairing once the response is complete")
+                normalizer = None
+                continue
+            emitted += len(blocks)
+            yield from blocks
+
+        blocks = None
+        if normalizer is not None:
+            try:
+                blocks = normalizer.close()
+            except ET.ParseError as e:
+                print(f"Invalid SSML at the end of the stream ({e}), repairing locally")
 
-            # Declare default namespaces
-            ET.register_namespace('', default_ns_uri)
+        if blocks is None:
+            try:
+                blocks = iter_voice_blocks(repair_ssml("".join(response_parts)))
+            except ET.ParseError:
+                if emitted:
+                    # Nothing is regenerated: the listener already hears the first part
+                    metrics.increment("ssml_stream_truncated")
+                    print("Could not repair the rest of the streamed script, ending early")
+                    return False
+                blocks = []
+            if len(blocks) > emitted:
+                metrics.increment("ssml_repaired")
+        else:
+            yield from blocks
+            emitted += len(blocks)
+            blocks = []
 
-            # Return the modified XML as a string
-            return ET.tostring(root, encoding='unicode')
-        except ET.ParseError:
-            # In case of parsing errors, simply return the original SSML
-            return ssml
+        if not emitted and not blocks:
+            # Malformed beyond repair, or well-formed without a single <voice>
+            metrics.increment("ssml_regenerated")
+            blocks = iter_voice_blocks(self.generate_ssml_with_retry(content, prompt, instructions))
+        yield from blocks[emitted:]
+        return True
 
     # Function to generate SSML with retry logic
-    def generate_ssml_with_retry(self, file_paths, prompt, max_retries=3, delay=2):
+    def generate_ssml_with_retry(self, content, prompt, instructions="", max_retries=3, delay=2):
+        # Identical requests reuse the validated script; failed attempts are never cached
+        content = content_to_text(content)
+        cache_key = response_cache_key(llm_router.model_identity, prompt, instructions, content)
+        cached_ssml = get_cached_response("ssml", cache_key)
+        if cached_ssml is not None:
+            return cached_ssml
+
+        ssml = self._generate_ssml_with_retry(content, prompt, instructions, max_retries)
+        llm_response_cache.set(cache_key, ssml)
+        return ssml
+
+    def _generate_ssml_with_retry(self, content, prompt, instructions, max_retries):
         attempts = 0
         while attempts < max_retries:
-            # Call the OpenAI function to generate SSML
-            ssml_response = openai_service.call_openai_for_response(file_paths, prompt)
-            filtered_ssml_response = '\n'.join(line for line in ssml_response.split('\n') if '```' not in line)
-            # Sanitize the SSML
-            sanitized_ssml = self.sanitize_ssml(filtered_ssml_response)
-
-            # Check if the sanitized SSML is valid
-            if self.is_valid_ssml(sanitized_ssml):
-                return sanitized_ssml
-
-            # If not valid, increment attempts and wait before retrying
+            # Ask the fastest healthy LLM provider for the SSML
+            ssml_response = llm_router.complete(prompt, content, instructions)
+            try:
+                # Strip code fences, drop non-<voice> children and validate in one pass
+                ssml = normalize_ssml(ssml_response)
+                # Well-formed but without voices (e.g. voices wrapped in <p>) would be silent
+                if VOICE_BLOCK_PATTERN.search(ssml):
+                    return ssml
+                print("No <voice> blocks in the SSML from the model")
+            except ET.ParseError as e:
+                print(f"Invalid SSML from the model ({e}), repairing locally")
+                try:
+                    repaired_ssml = normalize_ssml(repair_ssml(ssml_response))
+                    if VOICE_BLOCK_PATTERN.search(repaired_ssml):
+                        metrics.increment("ssml_repaired")
+                        return repaired_ssml
+                except ET.ParseError:
+                    pass
+
+            # Nothing usable even after local repair, ask the model again
+            metrics.increment("ssml_regenerated")
             attempts += 1
 
         # Optionally raise an exception or return an error if max retries reached
@@ -1,41 +1,35 @@
 from dotenv import load_dotenv
-import azure.cognitiveservices.speech as speechsdk
-import os
+from app.services.tts_backends import create_tts_backend
+import sys
+import time
 
 # Load environment variables
 load_dotenv()
 
-class AzureSpeechService:
-    def __init__(self):
-        # Load Azure Speech API key and region
-        self.speech_key = os.environ.get("SPEECH_KEY")
-        self.speech_region = os.environ.get("SPEECH_REGION")
-
-        if not self.speech_key or not self.speech_region:
-            raise ValueError("SPEECH_KEY or SPEECH_REGION is missing in .env file!")
-
-        self.speech_config = speechsdk.SpeechConfig(subscription=self.speech_key, region=self.speech_region)
-        self.audio_config = speechsdk.audio.AudioOutputConfig(use_default_speaker=True)
-
-    def text_to_speech(self, text: str):
-        # Create a speech synthesizer
-        synthesizer = speechsdk.SpeechSynthesizer(speech_config=self.speech_config, audio_config=self.audio_config)
-
-        # Perform speech synthesis (speak the text)
-        result = synthesizer.speak_text_async(text).get()
-
-        if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-            print("Successfully synthesized the text to speech!")
-        elif result.reason == speechsdk.ResultReason.Canceled:
-            print("Speech synthesis failed: ", result.cancellation_details.reason)
-            print("Details: ", result.cancellation_details.error_details)
+SAMPLE_SSML = """<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-US">
+<voice name="en-US-AvaMultilingualNeural">
+Hello, this is a test of the text to speech service.
+<break time="500ms" />
+</voice>
+<voice name="en-US-BrianMultilingualNeural">
+Thanks Ava, it is great to be here.
+</voice>
+</speak>"""
 
 if __name__ == "__main__":
-    # Example text
-    text_to_convert = "Hello, this is a test of Azure's text to speech service."
-    
-    # Create instance of the speech service
-    azure_service = AzureSpeechService()
-
-    # Convert text to speech
-    azure_service.text_to_speech(text_to_convert)
+    # Usage: python -m app.services.speech_test [auto|azure_batch|azure_realtime|local] [output.mp3]
+    backend = create_tts_backend(sys.argv[1] if len(sys.argv) > 1 else None)
+    output_path = sys.argv[2] if len(sys.argv) > 2 else "speech_test.mp3"
+
+    start = time.perf_counter()
+    result = backend.synthesize(SAMPLE_SSML)
+    elapsed = time.perf_counter() - start
+
+    if result is None:
+        print(f"Speech synthesis with {backend.name} failed")
+        sys.exit(1)
+
+    with open(output_path, "wb") as f:
+        f.write(result.audio)
+    print(f"Synthesized {len(result.audio)} bytes and {len(result.word_boundaries)} word boundaries "
+          f"with {backend.name} in {elapsed:.2f}s -> {output_path}")
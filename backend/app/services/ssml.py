@@ -0,0 +1,203 @@
+import re
+import xml.etree.ElementTree as ET
+from xml.parsers import expat
+
+DEFAULT_SPEAK_TAG = '<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-US">'
+CLOSING_SPEAK_TAG = "</speak>"
+CODE_FENCE = "```"
+# SSML elements that never have content
+EMPTY_ELEMENTS = {"break", "mark", "audio", "bookmark"}
+
+TAG_PATTERN = re.compile(r"<(/?)([A-Za-z_][\w.:-]*)([^<>]*?)(/?)>")
+BARE_AMPERSAND_PATTERN = re.compile(r"&(?!(?:[A-Za-z][A-Za-z0-9]*|#[0-9]+|#x[0-9A-Fa-f]+);)")
+# A "<" that does not open a complete tag is text
+STRAY_ANGLE_PATTERN = re.compile(r"<(?![A-Za-z_/?!][^<>]*>)")
+XML_DECLARATION_PATTERN = re.compile(r"^<\?xml[^>]*\?>\s*")
+
+
+def local_name(tag: str) -> str:
+    return tag.rsplit(":", 1)[-1]
+
+
+class SSMLNormalizer:
+    """
+    Incrementally cleans up SSML returned by the LLM in a single pass.
+
+    Text is fed as it becomes available. Lines holding markdown code fences
+    are skipped and the rest goes through an expat pull parser, which checks
+    that the XML is well-formed as it arrives. Every <voice> child of the
+    root is emitted as soon as it closes, copied verbatim from the input, so
+    nothing is re-serialized. Anything else at the top level (stray <break>
+    tags, loose text) is dropped. Only the input of the voice block still
+    open is kept around.
+
+    Malformed XML raises xml.etree.ElementTree.ParseError from `feed` or `close`.
+    """
+
+    def __init__(self):
+        self._parser = expat.ParserCreate("utf-8")
+        self._parser.StartElementHandler = self._start_element
+        self._parser.EndElementHandler = self._end_element
+        self._pending_line = ""
+        self._started = False
+        self._buffer = bytearray()
+        # Document byte offset of self._buffer[0]
+        self._buffer_offset = 0
+        self._depth = 0
+        self._block_start = None
+        self._blocks = []
+
+    def feed(self, text: str) -> list[str]:
+        """Feeds more LLM output and returns the voice blocks completed by it."""
+        text = self._pending_line + text
+        # Hold back the last partial line, it may still turn out to be a code fence
+        cut = text.rfind("\n") + 1
+        self._pending_line = text[cut:]
+        return self._parse(text[:cut], final=False)
+
+    def close(self) -> list[str]:
+        """Flushes the remaining input and returns the last voice blocks."""
+        text, self._pending_line = self._pending_line, ""
+        return self._parse(text, final=True)
+
+    def _parse(self, text: str, final: bool) -> list[str]:
+        if CODE_FENCE in text:
+            text = "".join(line for line in text.splitlines(keepends=True) if CODE_FENCE not in line)
+        if not self._started:
+            # The XML declaration must be the first thing the parser sees
+            text = text.lstrip()
+            self._started = bool(text)
+
+        data = text.encode("utf-8")
+        self._buffer += data
+        try:
+            self._parser.Parse(data, final)
+        except expat.ExpatError as e:
+            raise ET.ParseError(str(e)) from None
+
+        blocks, self._blocks = self._blocks, []
+        keep_from = self._block_start if self._block_start is not None else self._buffer_offset + len(self._buffer)
+        del self._buffer[:keep_from - self._buffer_offset]
+        self._buffer_offset = keep_from
+        return blocks
+
+    def _start_element(self, name, attributes):
+        self._depth += 1
+        if self._depth == 2 and local_name(name) == "voice":
+            self._block_start = self._parser.CurrentByteIndex
+
+    def _end_element(self, name):
+        self._depth -= 1
+        if self._depth != 1 or self._block_start is None:
+            return
+        start = self._block_start - self._buffer_offset
+        end_tag = self._parser.CurrentByteIndex - self._buffer_offset
+        self._block_start = None
+        # expat reports the end of a self-closing <voice/> right after it, where
+        # the next tag starts; only a real end tag names the voice again
+        closing = b"</" + name.encode("utf-8")
+        after = self._buffer[end_tag + len(closing):end_tag + len(closing) + 1]
+        if self._buffer[end_tag:end_tag + len(closing)] != closing or not (after == b">" or after.isspace()):
+            # A self-closing <voice/> has nothing to say
+            return
+        end = self._buffer.index(b">", end_tag) + 1
+        self._blocks.append(self._buffer[start:end].decode("utf-8"))
+
+
+def iter_voice_blocks(ssml: str) -> list[str]:
+    """
+    Returns the serialized <voice> blocks of one LLM response.
+
+    Raises:
+        xml.etree.ElementTree.ParseError: When the response is not well-formed XML
+    """
+    normalizer = SSMLNormalizer()
+    return normalizer.feed(ssml) + normalizer.close()
+
+
+def build_ssml(voice_blocks: list[str]) -> str:
+    return DEFAULT_SPEAK_TAG + "\n" + "\n".join(voice_blocks) + "\n" + CLOSING_SPEAK_TAG
+
+
+def normalize_ssml(*fragments: str) -> str:
+    """
+    Normalizes LLM SSML responses and merges them into one document.
+
+    Each fragment is parsed once; their voice blocks are joined in order under
+    a single <speak> root.
+
+    Raises:
+        xml.etree.ElementTree.ParseError: When a fragment is not well-formed XML
+    """
+    blocks = []
+    for fragment in fragments:
+        blocks.extend(iter_voice_blocks(fragment))
+    return build_ssml(blocks)
+
+
+def merge_ssml(*documents: str) -> str:
+    """
+    Merges documents returned by `normalize_ssml` without parsing them again.
+    """
+    bodies = [document[len(DEFAULT_SPEAK_TAG) + 1:-len(CLOSING_SPEAK_TAG) - 1] for document in documents]
+    return build_ssml([body for body in bodies if body])
+
+
+def repair_ssml(ssml: str) -> str:
+    """
+    Fixes the structural defects LLMs commonly leave in SSML, without calling the LLM again.
+
+    Bare `&` and `<` in text are escaped, empty elements such as <break> are
+    self-closed, text before the first tag and after the root is dropped, end
+    tags without a matching start tag are removed, a new <voice> closes the
+    previous one, elements still open at the end are closed, and voices
+    without a <speak> root are wrapped in one. The result is not guaranteed
+    to be valid; pass it through `normalize_ssml` to find out.
+    """
+    ssml = "".join(line for line in ssml.splitlines(keepends=True) if CODE_FENCE not in line)
+    first_tag = ssml.find("<")
+    if first_tag == -1:
+        return ssml
+    ssml = BARE_AMPERSAND_PATTERN.sub("&amp;", ssml[first_tag:])
+    ssml = STRAY_ANGLE_PATTERN.sub("&lt;", ssml)
+
+    parts, open_tags, position = [], [], 0
+    has_root = False
+    for match in TAG_PATTERN.finditer(ssml):
+        parts.append(ssml[position:match.start()])
+        position = match.end()
+        closing, name, attributes, self_closing = match.groups()
+        tag = local_name(name)
+
+        if tag in EMPTY_ELEMENTS:
+            if not closing:
+                parts.append(f"<{name}{attributes.rstrip()} />")
+            continue
+        if self_closing:
+            parts.append(match.group())
+        elif not closing:
+            if tag == "voice" and "voice" in map(local_name, open_tags):
+                # Voices never nest: the model forgot to close the previous one
+                while local_name(open_tags[-1]) != "voice":
+                    parts.append(f"</{open_tags.pop()}>")
+                parts.append(f"</{open_tags.pop()}>")
+            has_root = has_root or (tag == "speak" and not open_tags)
+            open_tags.append(name)
+            parts.append(match.group())
+        elif name in open_tags:
+            # Close whatever the model left open inside this element
+            while open_tags[-1] != name:
+                parts.append(f"</{open_tags.pop()}>")
+            parts.append(f"</{open_tags.pop()}>")
+            if has_root and not open_tags:
+                # Chatter after the root element ends
+                position = len(ssml)
+                break
+        # Any other end tag has no start tag and is dropped
+
+    parts.append(ssml[position:])
+    parts.extend(f"</{name}>" for name in reversed(open_tags))
+    repaired = "".join(parts)
+    if not has_root:
+        repaired = DEFAULT_SPEAK_TAG + XML_DECLARATION_PATTERN.sub("", repaired) + CLOSING_SPEAK_TAG
+    return repaired
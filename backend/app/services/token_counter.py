@@ -0,0 +1,80 @@
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+import tiktoken
+from app.core.metrics import metrics
+
+DEFAULT_MODEL = "gpt-4o"
+# Rough characters per token of English prose and source code for OpenAI tokenizers
+APPROX_CHARS_PER_TOKEN = 4
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(model: str = DEFAULT_MODEL):
+    """Loads the tokenizer of `model` once per process; building one costs far more than encoding."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")  # fallback encoding
+
+
+class TokenCounter:
+    """
+    Counts tokens with a shared encoder and remembers the counts by content hash.
+
+    The same file tree and README are counted again on every /generate/cost
+    call for a repository, so exact counts are kept in a small LRU keyed by
+    a hash of the text. Approximate counts skip the tokenizer entirely and
+    estimate from the length, for callers that only need a ballpark figure.
+
+    Args:
+        model (str): Model whose tokenizer is used
+        max_entries (int): Number of memoized counts kept
+    """
+
+    def __init__(self, model: str = DEFAULT_MODEL, max_entries: int = 1024):
+        self.model = model
+        self.max_entries = max_entries
+        self._counts: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def approximate(text: str) -> int:
+        return -(-len(text) // APPROX_CHARS_PER_TOKEN)
+
+    def count(self, text: str, approximate: bool = False) -> int:
+        return self.count_batch([text], approximate)[0]
+
+    def count_batch(self, texts: list[str], approximate: bool = False) -> list[int]:
+        """Counts several texts; the ones not seen before are encoded in one batch."""
+        if approximate:
+            return [self.approximate(text) for text in texts]
+
+        keys = [hashlib.sha256(text.encode("utf-8")).hexdigest() for text in texts]
+        with self._lock:
+            counts = [self._lookup(key) for key in keys]
+        missing = [i for i, count in enumerate(counts) if count is None]
+        metrics.increment("token_count_memo_hits", len(texts) - len(missing))
+        metrics.increment("token_count_memo_misses", len(missing))
+        if not missing:
+            return counts
+
+        # Repository text may contain special token text, which is plain text here
+        encoded = get_encoding(self.model).encode_ordinary_batch([texts[i] for i in missing])
+        with self._lock:
+            for i, tokens in zip(missing, encoded):
+                counts[i] = len(tokens)
+                self._counts[keys[i]] = counts[i]
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+        return counts
+
+    def _lookup(self, key: str) -> int | None:
+        count = self._counts.get(key)
+        if count is not None:
+            self._counts.move_to_end(key)
+        return count
+
+
+token_counter = TokenCounter()
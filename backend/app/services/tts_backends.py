@@ -0,0 +1,360 @@
+import asyncio
+import os
+import re
+import threading
+import time
+import uuid
+import zipfile
+from io import BytesIO
+import json
+import requests
+import azure.cognitiveservices.speech as speechsdk
+from dataclasses import dataclass, field
+from app.services.webvtt import WordBoundary
+
+# Format shared by every backend so segments can be concatenated frame by frame
+OUTPUT_FORMAT = "audio-16khz-32kbitrate-mono-mp3"
+# Attempts per chunk and the pause between them, shared by the Azure backends
+MAX_RETRIES = 3
+RETRY_DELAY = 2
+
+
+class MemoryStreamCallback(speechsdk.audio.PushAudioOutputStreamCallback):
+    """
+    Collects synthesized audio pushed by the Speech SDK.
+
+    Chunks are appended to one growable buffer straight from the SDK's
+    memoryview, so ingestion stays linear in the audio size. Consumers can
+    read the finished audio, or iterate over it while synthesis is running.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._buffer = bytearray()
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def write(self, audio_buffer: memoryview) -> int:
+        with self._condition:
+            # bytearray extends in place from the buffer protocol, no intermediate bytes object
+            self._buffer += audio_buffer
+            self._condition.notify_all()
+        return audio_buffer.nbytes
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def get_audio_data(self) -> bytes:
+        with self._condition:
+            return bytes(self._buffer)
+
+    def _next_chunk(self, position: int) -> bytes | None:
+        # Blocks until there is data past `position`, or returns None once closed and drained
+        with self._condition:
+            self._condition.wait_for(lambda: len(self._buffer) > position or self._closed)
+            if len(self._buffer) > position:
+                return bytes(self._buffer[position:])
+            return None
+
+    def iter_chunks(self):
+        """Yields audio as it arrives until the stream is closed."""
+        position = 0
+        while (chunk := self._next_chunk(position)) is not None:
+            position += len(chunk)
+            yield chunk
+
+    async def __aiter__(self):
+        """Async counterpart of iter_chunks; waiting happens off the event loop."""
+        position = 0
+        while (chunk := await asyncio.to_thread(self._next_chunk, position)) is not None:
+            position += len(chunk)
+            yield chunk
+
+
+@dataclass
+class SynthesisResult:
+    audio: bytes
+    # Spoken words with their timing, empty when the engine did not report any
+    word_boundaries: list[WordBoundary] = field(default_factory=list)
+
+
+class TTSBackend:
+    """Turns one SSML document into MP3 bytes in OUTPUT_FORMAT plus word timings."""
+    name = "base"
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def synthesize(self, ssml_string: str) -> SynthesisResult | None:
+        raise NotImplementedError
+
+
+class AzureBatchTTSBackend(TTSBackend):
+    """Azure batch synthesis REST API: submit a job, poll it, download the zipped result."""
+    name = "azure_batch"
+
+    INITIAL_POLL_DELAY = 0.5
+    POLL_BACKOFF = 1.5
+    MAX_POLL_DELAY = 5.0
+
+    def __init__(self, speech_key=None, speech_region=None):
+        self.speech_key = speech_key or os.environ.get("SPEECH_KEY")
+        self.speech_region = speech_region or os.environ.get("SPEECH_REGION")
+
+    @property
+    def available(self) -> bool:
+        return bool(self.speech_key and self.speech_region)
+
+    def synthesize(self, ssml_string: str) -> SynthesisResult | None:
+        """
+        Converts a string to an mp3 bytes object using Azure Text to Speech Batch Synthesis API.
+
+        Args:
+            ssml_string (str): Text to be converted to speech
+
+        Returns:
+            SynthesisResult | None: Returns mp3 bytes and word boundaries, None if error
+        """
+
+        if not self.available:
+            return None
+
+        synthesis_id = str(uuid.uuid4())
+        put_url = f"https://{self.speech_region}.api.cognitive.microsoft.com/texttospeech/batchsyntheses/{synthesis_id}?api-version=2024-04-01"
+
+        headers = {
+            "Ocp-Apim-Subscription-Key": self.speech_key,
+            "Content-Type": "application/json"
+        }
+
+        body = {
+            "description": "my ssml test",
+            "inputKind": "SSML",
+            "inputs": [
+                {"content": ssml_string}
+            ],
+            "properties": {
+                "outputFormat": OUTPUT_FORMAT,
+                "wordBoundaryEnabled": True,
+                "sentenceBoundaryEnabled": False,
+                "concatenateResult": False,
+                "decompressOutputFiles": False
+            }
+        }
+
+        for attempt in range(MAX_RETRIES):
+            try:
+                put_response = requests.put(put_url, headers=headers, json=body)
+                put_response.raise_for_status()
+
+                # Polling operation status
+                status_url = f"https://{self.speech_region}.api.cognitive.microsoft.com/texttospeech/batchsyntheses/{synthesis_id}?api-version=2024-04-01"
+                poll_delay = self.INITIAL_POLL_DELAY
+                while True:
+                    time.sleep(poll_delay)
+                    status_response = requests.get(status_url, headers=headers)
+                    status_response.raise_for_status()
+                    # Short jobs finish within a second or two; back off for long ones
+                    retry_after = status_response.headers.get("Retry-After")
+                    poll_delay = float(retry_after) if retry_after and retry_after.isdigit() else min(
+                        poll_delay * self.POLL_BACKOFF, self.MAX_POLL_DELAY)
+                    status = status_response.json()
+                    operation_status = status.get("status")
+
+                    if operation_status == "Succeeded":
+                        download_url = status["outputs"]["result"]
+                        zip_response = requests.get(download_url)
+                        zip_response.raise_for_status()
+
+                        # Extract the audio and its word boundaries from the zip
+                        audio_content, word_boundaries = None, []
+                        with zipfile.ZipFile(BytesIO(zip_response.content)) as zip_file:
+                            for file_name in zip_file.namelist():
+                                if file_name.endswith(".wav") or file_name.endswith(".mp3"):
+                                    audio_content = zip_file.read(file_name)
+                                elif file_name.endswith(".word.json"):
+                                    word_boundaries = parse_batch_word_boundaries(json.loads(zip_file.read(file_name)))
+                        if audio_content is None:
+                            raise Exception("Batch synthesis result contains no audio")
+                        return SynthesisResult(audio_content, word_boundaries)
+                    elif operation_status == "Failed":
+                        raise Exception("Batch synthesis failed")
+                    elif operation_status in ["Running", "NotStarted"]:
+                        continue
+                    else:
+                        raise Exception(f"Unexpected operation status: {operation_status}")
+
+            except Exception as e:
+                print(f"Exception occurred: {str(e)}")
+                if attempt < MAX_RETRIES - 1:
+                    print(f"Retrying... (attempt {attempt + 1}/{MAX_RETRIES})")
+                    time.sleep(RETRY_DELAY)
+                else:
+                    return None
+
+
+class AzureRealtimeTTSBackend(TTSBackend):
+    """Azure Speech SDK realtime synthesis, collecting the audio through a push stream."""
+    name = "azure_realtime"
+
+    def __init__(self, speech_key=None, speech_region=None):
+        self.speech_key = speech_key or os.environ.get("SPEECH_KEY")
+        self.speech_region = speech_region or os.environ.get("SPEECH_REGION")
+        self._speech_config = None
+
+    @property
+    def available(self) -> bool:
+        return bool(self.speech_key and self.speech_region)
+
+    def synthesize(self, ssml_string: str) -> SynthesisResult | None:
+        if not self.available:
+            return None
+
+        if self._speech_config is None:
+            self._speech_config = speechsdk.SpeechConfig(subscription=self.speech_key, region=self.speech_region)
+            self._speech_config.set_speech_synthesis_output_format(
+                speechsdk.SpeechSynthesisOutputFormat.Audio16Khz32KBitRateMonoMp3)
+
+        for attempt in range(MAX_RETRIES):
+            try:
+                result = self._synthesize_once(ssml_string)
+                if result is not None:
+                    return result
+            except Exception as e:
+                print(f"Exception occurred: {str(e)}")
+            # Cancellations are mostly throttling; retry like the batch backend does
+            if attempt < MAX_RETRIES - 1:
+                print(f"Retrying... (attempt {attempt + 1}/{MAX_RETRIES})")
+                time.sleep(RETRY_DELAY)
+        return None
+
+    def _synthesize_once(self, ssml_string: str) -> SynthesisResult | None:
+        # Audio is pushed into the callback as it is produced; the SDK signals
+        # completion through the result future, no status polling involved
+        callback = MemoryStreamCallback()
+        audio_config = speechsdk.audio.AudioOutputConfig(stream=speechsdk.audio.PushAudioOutputStream(callback))
+        synthesizer = speechsdk.SpeechSynthesizer(speech_config=self._speech_config, audio_config=audio_config)
+
+        word_boundaries = []
+
+        def on_word_boundary(evt):
+            if evt.boundary_type != speechsdk.SpeechSynthesisBoundaryType.Sentence:
+                # audio_offset is in 100 ns ticks
+                word_boundaries.append(WordBoundary(evt.text, evt.audio_offset / 10_000_000, evt.duration.total_seconds()))
+
+        synthesizer.synthesis_word_boundary.connect(on_word_boundary)
+
+        result = synthesizer.speak_ssml_async(ssml_string).get()
+        callback.close()
+        if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
+            return SynthesisResult(callback.get_audio_data(), word_boundaries)
+        if result.reason == speechsdk.ResultReason.Canceled:
+            print("Speech synthesis failed: ", result.cancellation_details.reason)
+            print("Details: ", result.cancellation_details.error_details)
+        return None
+
+
+class LocalTTSBackend(TTSBackend):
+    """
+    Offline stand-in producing silent but valid MP3 audio of realistic length.
+
+    The duration is estimated from the spoken words and <break> times, so
+    captions, streaming and storage behave as with real speech. Output is
+    deterministic for a given SSML. Set LOCAL_TTS_REALTIME_FACTOR to also
+    simulate synthesis latency, e.g. 0.05 waits 3 seconds per minute of audio.
+    """
+    name = "local"
+
+    WORDS_PER_MINUTE = 150
+    # MPEG-2 Layer III, 32 kbit/s, 16 kHz, mono, no padding: 144 byte frames of 576 samples
+    FRAME_HEADER = bytes([0xFF, 0xF3, 0x48, 0xC0])
+    FRAME_SIZE = 144
+    FRAME_SECONDS = 576 / 16000
+
+    def __init__(self, realtime_factor=None):
+        self.realtime_factor = realtime_factor if realtime_factor is not None else float(
+            os.environ.get("LOCAL_TTS_REALTIME_FACTOR", "0"))
+
+    def synthesize(self, ssml_string: str) -> SynthesisResult | None:
+        word_boundaries, duration = self.estimate_timing(ssml_string)
+        if self.realtime_factor:
+            time.sleep(duration * self.realtime_factor)
+        # An all-zero side info block decodes as silence
+        frame = self.FRAME_HEADER + bytes(self.FRAME_SIZE - len(self.FRAME_HEADER))
+        return SynthesisResult(frame * max(1, round(duration / self.FRAME_SECONDS)), word_boundaries)
+
+    def estimate_timing(self, ssml_string: str) -> tuple[list[WordBoundary], float]:
+        """Lays the words and <break> pauses of the SSML out on a timeline at a fixed speaking rate."""
+        word_seconds = 60 / self.WORDS_PER_MINUTE
+        position = 0.0
+        word_boundaries = []
+        for tag, text in re.findall(r'(<[^>]+>)|([^<]+)', ssml_string):
+            if tag:
+                pause = re.match(r'<break[^>]*time="([\d.]+)\s*(ms|s)"', tag)
+                if pause:
+                    position += float(pause.group(1)) / (1000 if pause.group(2) == "ms" else 1)
+                continue
+            for word in text.split():
+                word_boundaries.append(WordBoundary(word, position, word_seconds))
+                position += word_seconds
+        return word_boundaries, position
+
+
+class AutoTTSBackend(TTSBackend):
+    """
+    Chooses the Azure synthesizer by SSML size.
+
+    Realtime synthesis returns audio as soon as it is produced but is capped
+    at roughly ten minutes of audio per request, so larger documents go
+    through the batch API. A chunk that still fails realtime synthesis after
+    its retries gets one more chance through the batch API.
+    """
+    name = "auto"
+
+    def __init__(self, realtime_max_chars=None):
+        self.realtime_max_chars = realtime_max_chars or int(os.environ.get("REALTIME_TTS_MAX_CHARS", "8000"))
+        self.realtime = AzureRealtimeTTSBackend()
+        self.batch = AzureBatchTTSBackend()
+
+    @property
+    def available(self) -> bool:
+        return self.realtime.available
+
+    def synthesize(self, ssml_string: str) -> SynthesisResult | None:
+        if len(ssml_string) <= self.realtime_max_chars:
+            result = self.realtime.synthesize(ssml_string)
+            if result is not None:
+                return result
+            print("Realtime synthesis failed, falling back to batch synthesis")
+        return self.batch.synthesize(ssml_string)
+
+
+def parse_batch_word_boundaries(entries: list[dict]) -> list[WordBoundary]:
+    # Batch synthesis reports offsets and durations in milliseconds
+    return [
+        WordBoundary(entry["Text"], entry["AudioOffset"] / 1000, entry.get("Duration", 0) / 1000)
+        for entry in entries
+        if entry.get("BoundaryType", "WordBoundary") != "SentenceBoundary"
+    ]
+
+
+TTS_BACKENDS = {
+    backend.name: backend
+    for backend in (AutoTTSBackend, AzureBatchTTSBackend, AzureRealtimeTTSBackend, LocalTTSBackend)
+}
+
+
+def create_tts_backend(name: str | None = None) -> TTSBackend:
+    """
+    Builds the TTS backend selected by `name` or the TTS_BACKEND environment variable.
+
+    Args:
+        name (str | None): "auto" (default), "azure_batch", "azure_realtime" or "local"
+    """
+    name = name or os.environ.get("TTS_BACKEND", "auto")
+    if name not in TTS_BACKENDS:
+        raise ValueError(f"Unknown TTS backend: {name}")
+    return TTS_BACKENDS[name]()
@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+
+CUE_SETTINGS = "line:5% align:center"
+SENTENCE_END = (".", "!", "?")
+
+
+@dataclass
+class WordBoundary:
+    """A spoken word reported by the TTS engine, timed in seconds from the start of the audio."""
+    text: str
+    offset: float
+    duration: float
+
+    @property
+    def end(self) -> float:
+        return self.offset + self.duration
+
+
+def seconds_to_timestamp(seconds: float) -> str:
+    # Convert seconds to VTT timestamp format (HH:MM:SS.mmm)
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    seconds = seconds % 60
+    return f"{hours:02}:{minutes:02}:{seconds:06.3f}"
+
+
+def add_line_breaks(text: str, max_length: int) -> str:
+    # Insert line breaks so no caption line is longer than max_length
+    lines, current_line = [], ""
+    for word in text.split():
+        if current_line and len(current_line) + len(word) + 1 > max_length:
+            lines.append(current_line)
+            current_line = word
+        else:
+            current_line += (" " if current_line else "") + word
+    if current_line:
+        lines.append(current_line)
+    return "\n".join(lines)
+
+
+class WebVTTCueBuilder:
+    """
+    Builds WebVTT cues from word boundaries in a single linear pass.
+
+    Words are grouped into a cue until it reaches `max_words_per_cue`, a
+    sentence ends after `min_words_per_cue` words, or a pause longer than
+    `pause_gap` seconds (a <break> or a change of speaker) separates two words.
+    Cues are written into a list and joined once at the end.
+
+    Args:
+        max_line_length (int): Maximum characters per caption line
+        max_words_per_cue (int): Hard limit on words in one cue
+        min_words_per_cue (int): Words needed before a sentence end closes the cue
+        pause_gap (float): Silence in seconds that always starts a new cue
+    """
+
+    def __init__(self, max_line_length=45, max_words_per_cue=30, min_words_per_cue=8, pause_gap=0.6):
+        self.max_line_length = max_line_length
+        self.max_words_per_cue = max_words_per_cue
+        self.min_words_per_cue = min_words_per_cue
+        self.pause_gap = pause_gap
+        self._parts = ["WEBVTT\n\n"]
+        self._cue_index = 0
+        self._words: list[WordBoundary] = []
+
+    def add(self, boundary: WordBoundary):
+        if self._words and boundary.offset - self._words[-1].end > self.pause_gap:
+            self._flush()
+
+        text = boundary.text.strip()
+        if self._words and text and all(not c.isalnum() for c in text):
+            # Punctuation boundaries belong to the preceding word
+            last = self._words[-1]
+            self._words[-1] = WordBoundary(last.text + text, last.offset, max(last.duration, boundary.end - last.offset))
+        elif text:
+            self._words.append(WordBoundary(text, boundary.offset, boundary.duration))
+
+        if len(self._words) >= self.max_words_per_cue or (
+                len(self._words) >= self.min_words_per_cue and self._words[-1].text.endswith(SENTENCE_END)):
+            self._flush()
+
+    def extend(self, boundaries):
+        for boundary in boundaries:
+            self.add(boundary)
+        return self
+
+    def render(self) -> str:
+        self._flush()
+        return "".join(self._parts)
+
+    def _flush(self):
+        if not self._words:
+            return
+        self._cue_index += 1
+        start, end = self._words[0].offset, self._words[-1].end
+        text = add_line_breaks(" ".join(word.text for word in self._words), self.max_line_length)
+        self._parts.append(
+            f"{self._cue_index}\n{seconds_to_timestamp(start)} --> {seconds_to_timestamp(end)} {CUE_SETTINGS}\n{text}\n\n")
+        self._words = []
+
+
+def boundaries_to_webvtt(boundaries, **builder_options) -> str:
+    """Renders a WebVTT document from word boundaries given in audio order."""
+    return WebVTTCueBuilder(**builder_options).extend(boundaries).render()
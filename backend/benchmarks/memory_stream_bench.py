@@ -0,0 +1,47 @@
+"""
+Micro-benchmark for MemoryStreamCallback ingestion.
+
+Feeds SDK-sized chunks for podcasts of increasing length and compares the
+previous `bytes +=` accumulation with the current buffer. Time per MB should
+stay flat for the current implementation and grow with length for the old one.
+
+Usage (from backend/): python -m benchmarks.memory_stream_bench
+"""
+import time
+from app.services.tts_backends import MemoryStreamCallback
+
+CHUNK_SIZE = 1024
+# 32 kbit/s mp3 is 4000 bytes per second of audio
+BYTES_PER_MINUTE = 4000 * 60
+
+
+class LegacyCallback:
+    def __init__(self):
+        self._audio_data = bytes()
+
+    def write(self, audio_buffer: memoryview) -> int:
+        self._audio_data += bytes(audio_buffer)
+        return audio_buffer.nbytes
+
+
+def feed(callback, total_bytes: int) -> float:
+    chunk = memoryview(bytes(CHUNK_SIZE))
+    start = time.perf_counter()
+    for _ in range(total_bytes // CHUNK_SIZE):
+        callback.write(chunk)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'minutes':>8} {'MB':>6} {'legacy s':>10} {'legacy s/MB':>12} {'current s':>10} {'current s/MB':>13}")
+    for minutes in (2, 4, 8, 16, 32):
+        total_bytes = minutes * BYTES_PER_MINUTE
+        megabytes = total_bytes / 1_000_000
+        legacy = feed(LegacyCallback(), total_bytes)
+        current = feed(MemoryStreamCallback(), total_bytes)
+        print(f"{minutes:>8} {megabytes:>6.1f} {legacy:>10.3f} {legacy / megabytes:>12.3f} "
+              f"{current:>10.3f} {current / megabytes:>13.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark for SSML clean-up of LLM responses.
+
+Runs the previous pipeline (fence filtering, sanitize parse and re-serialize,
+validation parse, <speak> regex stripping and wrapping of both halves) and
+the single-pass normalizer over scripts of increasing length.
+
+Usage (from backend/): python -m benchmarks.ssml_normalizer_bench
+"""
+import re
+import time
+import xml.etree.ElementTree as ET
+from app.services.ssml import DEFAULT_SPEAK_TAG, normalize_ssml, merge_ssml
+
+VOICE_BLOCK = """<voice name="en-US-AvaMultilingualNeural">
+So, umm, this module wires the <emphasis>router</emphasis> to the services &amp; caches.
+<break time="500ms" />
+Each request resolves the repository first, then fetches the files it needs.
+</voice>
+<voice name="en-US-DustinMultilingualNeural">
+    Right, and the results are cached by commit so repeat visits are cheap.
+    <break time="300ms" />
+</voice>
+"""
+REPEATS = 5
+
+
+def make_response(blocks: int) -> str:
+    return f"```xml\n{DEFAULT_SPEAK_TAG}\n<break time=\"500ms\" />\n{VOICE_BLOCK * blocks}</speak>\n```"
+
+
+def legacy_clean(ssml_response: str) -> str:
+    filtered = '\n'.join(line for line in ssml_response.split('\n') if '```' not in line)
+    root = ET.fromstring(filtered)
+    default_ns_uri = root.tag.split('}')[0].strip('{')
+    for child in list(root):
+        tag_name = child.tag
+        tag_without_ns = tag_name.split('}')[1] if '}' in tag_name else tag_name
+        if tag_without_ns != 'voice':
+            root.remove(child)
+    ET.register_namespace('', default_ns_uri)
+    sanitized = ET.tostring(root, encoding='unicode')
+    ET.fromstring(sanitized)
+    return sanitized
+
+
+def legacy_merge(first: str, second: str) -> str:
+    def remove_first_speak_tag(content):
+        content = re.sub(r'<speak[^>]*>', '', content, count=1)
+        return re.sub(r'</speak>', '', content, count=1)
+
+    combined = f"{remove_first_speak_tag(first)}\n{remove_first_speak_tag(second)}"
+    return f'{DEFAULT_SPEAK_TAG}{combined}</speak>'
+
+
+def legacy(response: str) -> str:
+    return legacy_merge(legacy_clean(response), legacy_clean(response))
+
+
+def current(response: str) -> str:
+    return merge_ssml(normalize_ssml(response), normalize_ssml(response))
+
+
+def timed(fn, response: str) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn(response)
+    return (time.perf_counter() - start) / REPEATS
+
+
+def main():
+    print(f"{'blocks':>8} {'KB':>8} {'legacy ms':>10} {'current ms':>11} {'speedup':>8}")
+    for blocks in (50, 200, 800, 3200):
+        response = make_response(blocks)
+        legacy_time = timed(legacy, response)
+        current_time = timed(current, response)
+        print(f"{blocks:>8} {len(response) / 1024:>8.0f} {legacy_time * 1000:>10.1f} "
+              f"{current_time * 1000:>11.1f} {legacy_time / current_time:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import time
+import pytest
+from fastapi import HTTPException
+from app.routers.artifacts import parse_range
+from app.services.artifact_store import ArtifactStore
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    (" bytes=0-0 ", (0, 0)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=0-99,200-299", "bytes=-", "items=0-99", "bytes=a-b", "0-99"])
+def test_multi_range_and_malformed_headers_are_ignored(header):
+    assert parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize("header, file_size", [
+    ("bytes=1000-", 1000),
+    ("bytes=500-100", 1000),
+    ("bytes=-0", 1000),
+    ("bytes=-10", 0),
+])
+def test_unsatisfiable_ranges(header, file_size):
+    with pytest.raises(HTTPException) as error:
+        parse_range(header, file_size)
+    assert error.value.status_code == 416
+    assert error.value.headers["Content-Range"] == f"bytes */{file_size}"
+
+
+def age(store: ArtifactStore, artifact_id: str, seconds: float):
+    mtime = time.time() - seconds
+    os.utime(store.path(artifact_id), (mtime, mtime))
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    assert store.put(b"audio", "mp3") == store.put(b"audio", "mp3")
+    assert store.read(store.put(b"audio", "mp3")) == b"audio"
+    assert store.read("not-an-id") is None
+
+
+def test_sweep_removes_expired_artifacts(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_age=3600)
+    old, fresh = store.put(b"old", "mp3"), store.put(b"fresh", "mp3")
+    age(store, old, 7200)
+
+    store.sweep()
+
+    assert store.path(old) is None and store.path(fresh) is not None
+
+
+def test_sweep_evicts_least_recently_used_over_the_size_bound(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_age=0, max_bytes=250)
+    first, second, third = (store.put(bytes([n]) * 100, "mp3") for n in range(3))
+    age(store, first, 30)
+    age(store, second, 20)
+    age(store, third, 10)
+    # Downloading the oldest one makes it the most recently used
+    store.touch(first)
+
+    store.sweep()
+
+    assert store.path(second) is None
+    assert store.path(first) is not None and store.path(third) is not None
@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from app.core.cache import DiskCache, MemoryCache
+from app.core.singleflight import SingleFlight
+
+
+@pytest.fixture(params=["memory", "disk"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return MemoryCache("test")
+    return DiskCache("test", str(tmp_path))
+
+
+def test_add_only_stores_absent_keys(cache):
+    async def scenario():
+        assert await cache.add("lock", "first")
+        assert not await cache.add("lock", "second")
+        assert await cache.get("lock") == "first"
+
+    asyncio.run(scenario())
+
+
+def test_delete_if_only_deletes_the_expected_value(cache):
+    async def scenario():
+        await cache.set("lock", "owner-b")
+        assert not await cache.delete_if("lock", "owner-a")
+        assert await cache.get("lock") == "owner-b"
+        assert await cache.delete_if("lock", "owner-b")
+        assert await cache.get("lock") is None
+        assert not await cache.delete_if("lock", "owner-b")
+
+    asyncio.run(scenario())
+
+
+def test_expired_entries_are_gone(cache):
+    async def scenario():
+        await cache.set("key", "value", ttl=0.01)
+        await asyncio.sleep(0.05)
+        assert await cache.get("key") is None
+        assert not await cache.delete_if("key", "value")
+        assert await cache.add("key", "new")
+
+    asyncio.run(scenario())
+
+
+def test_overrunning_run_keeps_the_lock_taken_over_by_another_worker():
+    store = MemoryCache("flight")
+    flight = SingleFlight(store, lock_ttl=0.05, poll_interval=0.01)
+
+    async def slow_run():
+        await asyncio.sleep(0.1)
+        # The lock expired meanwhile and another worker took it
+        assert await store.add("lock:job", "other-worker")
+        return "done"
+
+    async def scenario():
+        assert await flight.do("job", slow_run) == "done"
+        assert await store.get("lock:job") == "other-worker"
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_callers_share_one_run():
+    calls = []
+    flight = SingleFlight(MemoryCache("flight"), poll_interval=0.01)
+
+    async def run():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return len(calls)
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("job", run) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [1] * 5
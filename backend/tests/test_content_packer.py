@@ -0,0 +1,75 @@
+import re
+import pytest
+from app.services import content_packer
+from app.services.content_packer import TRUNCATION_MARKER, PromptSection, pack_sections
+
+
+class WordEncoding:
+    """One token per space separated word, so budgets are easy to reason about."""
+
+    def encode_ordinary(self, text):
+        return text.split(" ")
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+@pytest.fixture(autouse=True)
+def word_encoding(monkeypatch):
+    monkeypatch.setattr(content_packer, "get_encoding", lambda model="gpt-4o": WordEncoding())
+
+
+def words(prefix: str, count: int) -> str:
+    return " ".join(f"{prefix}{i}" for i in range(count)) + " "
+
+
+def token_count(text: str) -> int:
+    return len(text.split(" "))
+
+
+def podcast_sections(files: int = 10):
+    return [
+        PromptSection("TREE " + words("t", 5000), priority=1, floor=1000),
+        PromptSection("README " + words("r", 800), priority=0, floor=500),
+        PromptSection("IMPORTANT-FILES: ", priority=-1),
+    ] + [PromptSection(f"FILE-{rank} " + words("f", 3000), priority=2 + rank, floor=400) for rank in range(files)]
+
+
+def test_content_that_fits_is_returned_whole():
+    sections = podcast_sections(files=2)
+    assert pack_sections(sections, 100_000) == "".join(section.text for section in sections)
+
+
+@pytest.mark.parametrize("budget", [50_000, 20_000, 8_000, 3_000, 1_000])
+def test_result_fits_the_budget(budget):
+    assert token_count(pack_sections(podcast_sections(), budget)) <= budget
+
+
+@pytest.mark.parametrize("budget", [20_000, 3_000, 1_000])
+def test_highest_priority_heading_survives_while_files_are_trimmed(budget):
+    assert "IMPORTANT-FILES: " in pack_sections(podcast_sections(), budget)
+
+
+def test_least_important_files_are_trimmed_first():
+    packed = pack_sections(podcast_sections(), 20_000)
+    kept = [rank for rank in range(10) if f"FILE-{rank} " in packed]
+    assert kept == list(range(len(kept)))
+    # Files that fit entirely are the most important ones
+    complete = [rank for rank in range(10) if f"FILE-{rank} " in packed and
+                f"FILE-{rank} " + words("f", 3000) in packed]
+    assert complete == list(range(len(complete)))
+
+
+def test_floors_hold_until_every_lower_priority_section_is_at_its_floor():
+    packed = pack_sections(podcast_sections(), 8_000)
+    # Every file is cut to its floor before the tree goes below full length; the README is untouched
+    assert len(re.findall(r"\bf398\b", packed)) == 10 and not re.search(r"\bf399\b", packed)
+    assert re.search(r"\bt998\b", packed) and not re.search(r"\bt4999\b", packed)
+    assert "README " + words("r", 800) in packed
+    assert packed.count(TRUNCATION_MARKER) == 11
+
+
+def test_sections_below_the_minimum_are_dropped():
+    packed = pack_sections(podcast_sections(), 1_000)
+    assert "FILE-" not in packed
+    assert "README" in packed
@@ -0,0 +1,61 @@
+import gzip
+import io
+import tarfile
+import pytest
+from app.services.github_archive import TarStreamReader
+
+ROOT = "octo-repo-0123abc"
+LONG_PATH = "src/" + "/".join(["deeply_nested_package_directory"] * 5) + "/module.py"
+
+
+def make_tarball(files: dict[str, bytes], tar_format, commit_sha=None) -> bytes:
+    buffer = io.BytesIO()
+    pax_headers = {"comment": commit_sha} if commit_sha else None
+    with tarfile.open(fileobj=buffer, mode="w", format=tar_format, pax_headers=pax_headers) as tar:
+        directory = tarfile.TarInfo(ROOT)
+        directory.type = tarfile.DIRTYPE
+        tar.addfile(directory)
+        for path, data in files.items():
+            info = tarfile.TarInfo(f"{ROOT}/{path}")
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return gzip.compress(buffer.getvalue())
+
+
+def read_archive(tarball: bytes, chunk_size: int = 333, **options):
+    reader = TarStreamReader(lambda path: not path.endswith(".png"), **options)
+    for start in range(0, len(tarball), chunk_size):
+        reader.feed(tarball[start:start + chunk_size])
+    return reader.close()
+
+
+@pytest.mark.parametrize("tar_format", [tarfile.PAX_FORMAT, tarfile.GNU_FORMAT])
+def test_long_names_are_read_from_extended_headers(tar_format):
+    assert len(f"{ROOT}/{LONG_PATH}") > 100
+    tarball = make_tarball({LONG_PATH: b"print('hi')\n", "README.md": b"# Octo\n"}, tar_format)
+
+    archive = read_archive(tarball)
+
+    assert archive.paths == [LONG_PATH, "README.md"]
+    assert archive.files[LONG_PATH] == "print('hi')\n"
+    assert archive.readme == "# Octo\n"
+
+
+def test_commit_sha_comes_from_the_global_pax_header():
+    tarball = make_tarball({"main.py": b"pass\n"}, tarfile.PAX_FORMAT, commit_sha="0123abc")
+
+    assert read_archive(tarball).commit_sha == "0123abc"
+
+
+def test_excluded_large_and_binary_files_are_not_extracted():
+    tarball = make_tarball({
+        "logo.png": b"\x89PNG",
+        "big.py": b"x = 1\n" * 100,
+        "blob.bin": b"\x00\x01\x02",
+        "small.py": b"y = 2\n",
+    }, tarfile.PAX_FORMAT)
+
+    archive = read_archive(tarball, chunk_size=1, max_file_bytes=100)
+
+    assert archive.paths == ["big.py", "blob.bin", "small.py"]
+    assert archive.files == {"small.py": "y = 2\n"}
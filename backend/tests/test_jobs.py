@@ -0,0 +1,76 @@
+import asyncio
+import time
+from app.core.cache import MemoryCache
+from app.core.jobs import FAILED, RUNNING, SUCCEEDED, JobManager
+
+
+async def wait_for_status(manager, job_id, statuses):
+    for _ in range(200):
+        job = await manager.get(job_id)
+        if job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job stuck in {job['status']}")
+
+
+def test_job_records_stages_and_result():
+    async def scenario():
+        manager = JobManager(MemoryCache("jobs"))
+
+        async def pipeline(report_stage):
+            await report_stage("working")
+            return {"answer": 42}
+
+        job_id = await manager.submit(pipeline)
+        job = await wait_for_status(manager, job_id, (SUCCEEDED, FAILED))
+        assert job["status"] == SUCCEEDED
+        assert job["result"] == {"answer": 42}
+
+    asyncio.run(scenario())
+
+
+def test_heartbeat_keeps_running_jobs_alive():
+    async def scenario():
+        manager = JobManager(MemoryCache("jobs"), lease=0.06)
+        release = asyncio.Event()
+
+        async def pipeline(report_stage):
+            await release.wait()
+            return None
+
+        job_id = await manager.submit(pipeline)
+        await asyncio.sleep(0.2)
+        assert (await manager.get(job_id))["status"] == RUNNING
+        release.set()
+        assert (await wait_for_status(manager, job_id, (SUCCEEDED, FAILED)))["status"] == SUCCEEDED
+
+    asyncio.run(scenario())
+
+
+def test_job_over_max_runtime_fails():
+    async def scenario():
+        manager = JobManager(MemoryCache("jobs"), max_runtime=0.05)
+
+        async def pipeline(report_stage):
+            await asyncio.sleep(10)
+
+        job_id = await manager.submit(pipeline)
+        job = await wait_for_status(manager, job_id, (SUCCEEDED, FAILED))
+        assert job["status"] == FAILED
+        assert job["error"] == "Job took too long"
+
+    asyncio.run(scenario())
+
+
+def test_job_with_expired_lease_is_reported_failed():
+    async def scenario():
+        store = MemoryCache("jobs")
+        manager = JobManager(store)
+        # A record left behind by a worker that died mid-job
+        await store.set("orphan", {"job_id": "orphan", "status": RUNNING, "stage": "ssml",
+                                   "lease_expires_at": time.time() - 1})
+        job = await manager.get("orphan")
+        assert job["status"] == FAILED
+        assert (await store.get("orphan"))["status"] == FAILED
+
+    asyncio.run(scenario())
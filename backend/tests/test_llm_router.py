@@ -0,0 +1,33 @@
+from app.core.metrics import metrics
+from app.services.llm_router import LLMProvider, LLMRouter
+
+
+class FakeProvider(LLMProvider):
+    def __init__(self, name, fail=False):
+        self.name = name
+        self.fail = fail
+
+    def complete(self, system_prompt, content, instructions=""):
+        if self.fail:
+            raise RuntimeError(f"{self.name} is down")
+        return self.name
+
+
+def test_unmeasured_providers_follow_measured_ones_in_configured_order():
+    primary, fallback, other = FakeProvider("rank-primary"), FakeProvider("rank-fallback"), FakeProvider("rank-other")
+    router = LLMRouter([primary, fallback, other])
+    assert router.ranked() == [primary, fallback, other]
+
+    metrics.observe("llm_rank-primary_latency_seconds", 30.0)
+    assert router.ranked() == [primary, fallback, other]
+
+    metrics.observe("llm_rank-other_latency_seconds", 5.0)
+    assert router.ranked() == [other, primary, fallback]
+
+
+def test_failed_provider_falls_through_and_moves_back():
+    broken, backup = FakeProvider("fail-broken", fail=True), FakeProvider("fail-backup")
+    router = LLMRouter([broken, backup], max_error_rate=0.5)
+
+    assert router.complete("system", "content") == "fail-backup"
+    assert router.ranked() == [backup, broken]
@@ -0,0 +1,50 @@
+import pytest
+from app.services.mp3_utils import mp3_duration_seconds, parse_frame_header
+
+# MPEG-2 Layer III, 32 kbit/s, 16 kHz, mono: the frames written by the local TTS backend
+LOCAL_TTS_FRAME = bytes([0xFF, 0xF3, 0x48, 0xC0]) + bytes(140)
+# MPEG-1 Layer III, 128 kbit/s, 44.1 kHz, joint stereo, no padding
+MPEG1_HEADER = bytes([0xFF, 0xFB, 0x90, 0x44])
+
+
+def id3_tag(body_size: int) -> bytes:
+    size = bytes((body_size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+    return b"ID3\x04\x00\x00" + size + bytes(body_size)
+
+
+def mpeg1_frame() -> bytes:
+    return MPEG1_HEADER + bytes(417 - len(MPEG1_HEADER))
+
+
+def xing_frame() -> bytes:
+    # Side information of a stereo MPEG-1 frame is 32 bytes, the tag follows it
+    frame = bytearray(mpeg1_frame())
+    frame[36:40] = b"Xing"
+    return bytes(frame)
+
+
+def test_frame_headers():
+    assert parse_frame_header(LOCAL_TTS_FRAME, 0) == (144, 576, 16000)
+    assert parse_frame_header(mpeg1_frame(), 0) == (417, 1152, 44100)
+    assert parse_frame_header(b"\xff\xfb\xf0\x44", 0) is None  # bitrate index 15 is invalid
+    assert parse_frame_header(b"ID3\x04", 0) is None
+
+
+def test_local_tts_frames():
+    assert mp3_duration_seconds(LOCAL_TTS_FRAME * 100) == pytest.approx(100 * 576 / 16000)
+
+
+def test_id3_tag_and_info_frame_are_skipped():
+    data = id3_tag(1000) + xing_frame() + mpeg1_frame() * 10
+    assert mp3_duration_seconds(data) == pytest.approx(10 * 1152 / 44100)
+
+
+def test_stitched_segments_with_junk_between_them():
+    segment = id3_tag(20) + LOCAL_TTS_FRAME * 50
+    data = segment + b"\x00junk" + segment
+    assert mp3_duration_seconds(data) == pytest.approx(100 * 576 / 16000)
+
+
+def test_empty_and_truncated_input():
+    assert mp3_duration_seconds(b"") == 0.0
+    assert mp3_duration_seconds(LOCAL_TTS_FRAME[:3]) == 0.0
@@ -0,0 +1,72 @@
+from app.services.ssml import DEFAULT_SPEAK_TAG, SSMLNormalizer, iter_voice_blocks, normalize_ssml, repair_ssml
+
+
+def test_normalize_keeps_only_voice_blocks():
+    ssml = '```xml\n<speak><break time="1s"/>loose<voice name="a">x</voice><voice name="b"/></speak>\n```'
+    assert normalize_ssml(ssml) == DEFAULT_SPEAK_TAG + '\n<voice name="a">x</voice>\n</speak>'
+
+
+def test_voice_ending_in_an_empty_element_is_kept():
+    assert iter_voice_blocks('<speak><voice name="a">x<break/></voice><voice name="b"/></speak>') == [
+        '<voice name="a">x<break/></voice>']
+
+
+def test_blocks_are_emitted_as_they_close():
+    normalizer = SSMLNormalizer()
+    assert normalizer.feed('<speak>\n<voice name="a">one</voice>\n<voice name="b">') == ['<voice name="a">one</voice>']
+    assert normalizer.feed('two</voice>\n') == ['<voice name="b">two</voice>']
+    assert normalizer.feed('</speak>') == []
+    assert normalizer.close() == []
+
+
+def repaired_blocks(ssml: str) -> list[str]:
+    return iter_voice_blocks(repair_ssml(ssml))
+
+
+def test_valid_ssml_is_unchanged():
+    ssml = '<speak><voice name="a">Hello <break time="1s" /> there</voice></speak>'
+    assert repair_ssml(ssml) == ssml
+
+
+def test_bare_ampersand_and_angle_brackets_are_escaped():
+    assert repaired_blocks('<speak><voice name="a">R&D, 1 < 2 & <bye</voice></speak>') == [
+        '<voice name="a">R&amp;D, 1 &lt; 2 &amp; &lt;bye</voice>']
+
+
+def test_existing_entities_are_kept():
+    assert repaired_blocks('<speak><voice name="a">&amp; &#169; &lt;</voice></speak>') == [
+        '<voice name="a">&amp; &#169; &lt;</voice>']
+
+
+def test_unclosed_voice_is_closed_by_the_next_one():
+    assert repaired_blocks('<speak><voice name="a">one<voice name="b">two</voice></speak>') == [
+        '<voice name="a">one</voice>', '<voice name="b">two</voice>']
+
+
+def test_elements_open_at_the_end_are_closed():
+    assert repaired_blocks('<speak><voice name="a">one <emphasis>two') == [
+        '<voice name="a">one <emphasis>two</emphasis></voice>']
+
+
+def test_empty_elements_are_self_closed():
+    assert repaired_blocks('<speak><voice name="a">x<break time="1s"></break>y</voice></speak>') == [
+        '<voice name="a">x<break time="1s" />y</voice>']
+
+
+def test_end_tags_without_start_tag_are_dropped():
+    assert repaired_blocks('<speak><voice name="a">a</p>b</voice></speak>') == ['<voice name="a">ab</voice>']
+
+
+def test_chatter_around_the_document_is_dropped():
+    ssml = 'Here you go:\n```xml\n<speak><voice name="a">x</voice></speak>\n```\nEnjoy the <podcast>!'
+    assert repaired_blocks(ssml) == ['<voice name="a">x</voice>']
+
+
+def test_voices_without_root_are_wrapped():
+    repaired = repair_ssml('<?xml version="1.0"?><voice name="a">x</voice>')
+    assert repaired.startswith(DEFAULT_SPEAK_TAG)
+    assert iter_voice_blocks(repaired) == ['<voice name="a">x</voice>']
+
+
+def test_text_without_tags_is_returned_as_is():
+    assert repair_ssml("no markup here") == "no markup here"
@@ -78,12 +78,12 @@ export function useDiagram(username: string, repo: string, audio_length: string,
             } else if (audioResult.audioBlob) {
                 const url = URL.createObjectURL(audioResult.audioBlob);
                 setAudioUrl(url);
-                console.log(audioResult.vtt);
-                if (audioResult.vtt) {
+                if (audioResult.vttUrl) {
+                    setSubtitleUrl(audioResult.vttUrl);
+                } else if (audioResult.vtt) {
                     // Decode the base64 content back to a text string
 
                     const decodedVtt = base64ToUtf8(audioResult.vtt);
-                    console.log(decodedVtt);
                     // Create a Blob with the decoded VTT content
                     const vttBlob = new Blob([decodedVtt], { type: 'text/vtt' });
 
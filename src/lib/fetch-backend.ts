@@ -46,6 +46,7 @@ interface GenerateAudioResponse {
     error?: string;
     audioBlob?: Blob;
     vtt?: string;
+    vttUrl?: string;
  }
 
  export async function generateAndCacheDiagram(
@@ -160,17 +161,34 @@ interface GenerateAudioResponse {
 
       const audioBlob = await response.blob();
       const audioBuffer = await blobToBuffer(audioBlob);
-      const vttContent = response.headers.get("x-vtt-content");
-
+      const audioMp3 = new Blob([audioBuffer], { type: 'audio/mpeg' });
+      // Captions are served as their own cacheable artifact, at a path relative to the backend
+      const vttPath = response.headers.get("x-vtt-url");
+      if (!vttPath) {
+        return { audioBlob: audioMp3 };
+      }
+      const vttUrl = new URL(vttPath, baseUrl).toString();
+      let vttContent: string;
+      try {
+        const vttResponse = await fetch(vttUrl);
+        if (!vttResponse.ok) {
+          throw new Error(`Captions request failed with status ${vttResponse.status}`);
+        }
+        vttContent = await vttResponse.text();
+      } catch (error) {
+        // The audio is still worth playing without captions
+        console.error("Error fetching captions:", error);
+        return { audioBlob: audioMp3 };
+      }
 
       // Call the server action to cache the diagram
      await cacheAudioAndWebVtt(
         username,
         repo + "|" + audio_length,
         b64encode(audioBuffer),
-        vttContent ?? '',
+        b64encode(Buffer.from(vttContent, 'utf-8')),
       );
-      return { audioBlob:new Blob([audioBuffer], { type: 'audio/mpeg' }),  vtt: vttContent ?? '' };
+      return { audioBlob: audioMp3, vttUrl };
     } catch (error) {
       console.error("Error generating audio:", error);
       return { error: "Failed to generate audio. Please try again later." };